@@ -1,112 +1,454 @@
-from genealogy_poudel_data import *
+from genealogy_class import Person
+from genealogy_snapshot import load_people
+from genealogy_io import write_atomic
 from genealogy_constants import *
-from bs4 import BeautifulSoup
-import json, re
+import genealogy_cache, genealogy_profile
+import gc, glob, gzip, hashlib, json, os, re, time, unicodedata
+try:
+    import brotli  # optional: only needed for the .br copy of the external data file
+except ImportError:
+    brotli = None
+
+class PersonIndex:
+    """
+    One-time identity index over the loaded data: id(person) -> python variable name -> generation.
+
+    Built once after `from genealogy_poudel_data import *` so renderers don't have to
+    scan globals() for every node. The first variable bound to a Person wins
+    (e.g. gopal_32 before its alias root_person), same as the old globals() scans.
+    """
+    def __init__(self, namespace):
+        self.var_names = {}
+        self.var_gens = {}
+        for var, obj in namespace.items():
+            if isinstance(obj, Person) and id(obj) not in self.var_names:
+                self.var_names[id(obj)] = var
+                m = re.search(r'_(\d+)', var)
+                if m:
+                    self.var_gens[id(obj)] = int(m.group(1))
+
+    def var_name(self, person):
+        """Python variable name the person was defined with, or None."""
+        return self.var_names.get(id(person))
+
+    def var_gen(self, person):
+        """Generation parsed from the variable name (gopal_32 -> 32), or None."""
+        return self.var_gens.get(id(person))
+
+# Person variables of genealogy_poudel_data.py (gopal_32, bishwamvar_34, ...), loaded from the compiled
+# snapshot when it is current, else by importing the .py (which also refreshes the snapshot).
+with genealogy_profile.stage("data") as _DATA_LOAD_STATS:
+    globals().update(load_people())
+
+PERSON_INDEX = PersonIndex(globals())
+
+DEFAULT_ROOT_GENERATION = 32
+
+def _root_generation(person):
+    """A root's generation: explicit gen_number (1-100), else the variable name (gopal_32 -> 32), else 32."""
+    gen = getattr(person, "gen_number", None)
+    if isinstance(gen, int) and 1 <= gen <= 100:
+        return gen
+    var_gen = PERSON_INDEX.var_gen(person)
+    if var_gen is not None:
+        return var_gen
+    return DEFAULT_ROOT_GENERATION
+
+def resolve_generations(roots):
+    """
+    Normalization pass: give every Person reachable from `roots` a resolved `generation`
+    (the root's generation, see _root_generation, +1 per level), stored on the node.
+
+    Renderers and exporters read person.generation instead of each re-deriving it, so the
+    tree pages, index.html records and gen-banner can't disagree. Run once per build
+    (build_site does it before the stages fork); iter_tree_lines / flatten_person /
+    export_roots_trees / update_index_html_in_place resolve unresolved roots, and anyone
+    added since the pass, themselves (_ensure_generations).
+
+    A person attached under two parents keeps the generation of its first place in tree order.
+
+    :return: list of warnings where the data disagrees with itself: an explicit gen_number
+             (or a root's variable name) that doesn't match the resolved generation, or a person
+             reached at two different generations.
+    """
+    warnings = []
+    resolved = {}  # id(person) -> generation, this pass only (stale values from an earlier pass are overwritten)
+    for root in roots:
+        root_gen = _root_generation(root)
+        var_gen = PERSON_INDEX.var_gen(root)
+        if var_gen is not None and var_gen != root_gen:
+            warnings.append(f"root {PERSON_INDEX.var_name(root)}: variable name says generation {var_gen}, "
+                            f"gen_number says {root_gen}")
+        stack = [(root, root_gen)]
+        while stack:
+            person, gen = stack.pop()
+            seen = resolved.get(id(person))
+            if seen is not None:
+                if seen != gen:
+                    warnings.append(f"{person.name} is reached at generation {seen} and {gen}; using {seen}")
+                continue
+            resolved[id(person)] = gen
+            person.generation = gen
+            explicit = getattr(person, "gen_number", None)
+            if explicit is not None and explicit != gen:
+                warnings.append(f"{person.name}: gen_number {explicit!r} but resolved generation {gen}")
+            for child in reversed(person.children):
+                stack.append((child, gen + 1))
+    return warnings
+
+def _ensure_generations(roots):
+    """
+    Make sure everyone reachable from `roots` has a generation before a renderer reads it.
+
+    Roots that haven't been through resolve_generations (e.g. a renderer called directly) get the
+    full pass; a person added after it ran gets their parent's generation + 1.
+    """
+    if any(getattr(root, "generation", None) is None for root in roots):
+        for warning in resolve_generations(roots):
+            print(f"⚠️  {warning}")
+        return
+    stack = list(roots)
+    while stack:
+        person = stack.pop()
+        for child in person.children:
+            if getattr(child, "generation", None) is None:
+                child.generation = person.generation + 1
+            stack.append(child)
 
 genealogy_json_file = "genealogy_tree.json"
-with open(genealogy_json_file, "w") as f:
-    json.dump(gopal_32.to_dict(), f, indent=2)
-    print(f"✅ {genealogy_json_file} successfully updated with genealogyData.")
+
+# Key order of Person.to_dict(), and the short keys used by export_json(..., abbreviate=True)
+JSON_KEY_ABBREVIATIONS = {
+    "name": "n", "name_nep": "nn", "gender": "g", "birth_year": "b", "death_year": "d",
+    "place": "p", "gen_number": "gn", "comment": "c", "father": "f", "father_nep": "fn",
+    "grandfather": "gf", "grandfather_nep": "gfn", "children": "ch",
+}
+
+def iter_json_chunks(roots, indent=None, abbreviate=False, ensure_ascii=None):
+    """
+    Yield the nested Person.to_dict() JSON of `roots` piece by piece, without building the dict tree.
+
+    Always an array with one object per root, exactly json.dumps([root.to_dict() for root in roots],
+    indent=indent), so consumers see the same shape however many roots there are. indent=None is
+    the compact form (no whitespace), and by default compact output keeps Nepali as UTF-8 instead
+    of \\u escapes.
+
+    :param abbreviate: use JSON_KEY_ABBREVIATIONS' short keys.
+    """
+    if ensure_ascii is None:
+        ensure_ascii = indent is not None
+    keys = {k: json.dumps(JSON_KEY_ABBREVIATIONS[k] if abbreviate else k) for k in JSON_KEY_ABBREVIATIONS}
+    key_sep = ":" if indent is None else ": "
+
+    def nl(level):
+        return "" if indent is None else "\n" + " " * (indent * level)
+
+    def value(v):
+        return json.dumps(v, ensure_ascii=ensure_ascii)
+
+    if not roots:
+        yield "[]"
+        return
+    yield "["
+
+    # ("node", person, father, grandfather, father_nep, grandfather_nep, level, is_last) or ("close", level, is_last)
+    stack = [("node", root, None, None, None, None, 1, i == len(roots) - 1)
+             for i, root in reversed(list(enumerate(roots)))]
+    while stack:
+        entry = stack.pop()
+        if entry[0] == "close":
+            _, level, is_last = entry
+            yield nl(level + 1) + "]" + nl(level) + "}" + ("" if is_last else ",")
+            continue
+
+        _, person, father, grandfather, father_nep, grandfather_nep, level, is_last = entry
+        fields = (("name", person.name), ("name_nep", person.name_nep), ("gender", person.gender),
+                  ("birth_year", person.birth_year), ("death_year", person.death_year),
+                  ("place", person.place), ("gen_number", person.gen_number), ("comment", person.comment),
+                  ("father", father), ("father_nep", father_nep),
+                  ("grandfather", grandfather), ("grandfather_nep", grandfather_nep))
+        inner = nl(level + 1)
+        chunk = nl(level) + "{"
+        chunk += ",".join(inner + keys[k] + key_sep + value(v) for k, v in fields)
+        chunk += "," + inner + keys["children"] + key_sep
+        if not person.children:
+            yield chunk + "[]" + nl(level) + "}" + ("" if is_last else ",")
+            continue
+        yield chunk + "["
+
+        # Same hand-down as Person.to_dict: the child's grandfather is this node's `father`
+        stack.append(("close", level, is_last))
+        count = len(person.children)
+        for i in range(count - 1, -1, -1):
+            stack.append(("node", person.children[i], person.name, father, person.name_nep,
+                          person.grandfather_nep, level + 2, i == count - 1))
+
+    yield nl(0) + "]"
+
+def export_json(roots, path=genealogy_json_file, compact=False, abbreviate=False):
+    """
+    Stream the nested family tree of all `roots` to `path`.
+
+    Pretty mode (the default) matches json.dump([root.to_dict() for root in roots], f, indent=2)
+    byte for byte;
+    compact=True drops the whitespace and \\u escapes for a much smaller file for the website.
+    """
+    with open(path, "w", encoding="utf-8", buffering=STREAM_BUFFER_SIZE) as f:
+        for chunk in iter_json_chunks(roots, indent=None if compact else 2, abbreviate=abbreviate):
+            f.write(chunk)
+    print(f"✅ {path} successfully updated with genealogyData.")
+    return path
 
 # Print tree with visual guide indentation
 def print_tree(person, level=0, prefix="", is_last=True, print_language="en",
                text_lines=None, html_lines=None, parent_color=None,
                vertical_color_map=None, earliest_gen_number=None, color_offset=0, current_gen=None):
     """
-    Recursively build the genealogy tree as HTML.
+    Collect the genealogy tree of `person` into text_lines / html_lines.
+
+    Thin list-building wrapper around iter_tree_lines(), which takes the same
+    rendering arguments and documents them.
+
+    :param text_lines: List the plain-text lines are appended to.
+    :param html_lines: List the HTML lines are appended to.
+    """
+    if text_lines is None:
+        text_lines = []
+    if html_lines is None:
+        html_lines = []
+    for text_line, html_line in iter_tree_lines(person, level=level, prefix=prefix, is_last=is_last,
+                                                print_language=print_language, parent_color=parent_color,
+                                                vertical_color_map=vertical_color_map,
+                                                earliest_gen_number=earliest_gen_number,
+                                                color_offset=color_offset, current_gen=current_gen):
+        text_lines.append(text_line)
+        html_lines.append(html_line)
+
+def tree_font_size(print_language):
+    """Name font size (px) on the tree pages; Nepali slightly bigger."""
+    return 24 if print_language == "en" else 28
+
+def iter_tree_lines(person, level=0, prefix="", is_last=True, print_language="en", parent_color=None,
+                    vertical_color_map=None, earliest_gen_number=None, color_offset=0, current_gen=None,
+                    cache=None, merge_spans=False, css_classes=False):
+    """
+    Yield the genealogy tree as (text_line, html_line) pairs, one per person.
 
     This function walks the `Person` hierarchy starting from the given node,
     and produces an indented, styled HTML representation of the family tree.
     It includes icons for gender, plus signs for newly added persons, and
     asterisks with tooltips for comments.
 
+    The walk uses an explicit stack instead of recursion, so arbitrarily deep
+    lines can't hit RecursionError. Children share their parent's
+    vertical_color_map and only copy it when they change it.
+
     :param person: The current Person node to render.
+    :param level: Depth of `person` in the rendered tree (0 for a root).
     :param prefix: String prefix used for indentation and connector lines.
     :param is_last: True if this person is the last child of the parent, controls connector rendering.
-    :param lang: Language code for rendering the name ("en" or "np").
-    :param my_color: Hex color string for styling connectors for this generation.
-    :param generation: Current generation depth, used for color-coding.
-    :return: List of HTML lines representing this person and all descendants.
+    :param print_language: Language code for rendering the name ("en" or "np").
+    :param parent_color: Color of the parent's generation, used for the connectors.
+    :param earliest_gen_number: Earliest generation across all roots, used to indent later roots.
+    :param color_offset: Offset into GENERATION_COLORS.
+    :param current_gen: Generation number to draw `person` with; defaults to person.generation
+                        (see resolve_generations). Descendants always use their own.
+    :param cache: Optional genealogy_cache.TreeRenderCache; unchanged subtrees are spliced from the
+                  previous build instead of being re-rendered.
+    :param merge_spans: Draw the connectors as one `<span class="gN">` per run of same-colored characters
+                        instead of one inline-styled span per character (needs the generation_css() rules
+                        in the page; export_roots_trees adds them). Looks the same, much smaller.
+    :param css_classes: Reference only class names (tree_class_css()) for the name, note link and edit
+                        mark colors and the name font size; implies merge_spans.
+    :return: Generator of (text_line, html_line) for this person and all descendants, in tree order.
     """
-    if text_lines is None:
-        text_lines = []
-    if html_lines is None:
-        html_lines = []
     if vertical_color_map is None:
         vertical_color_map = {}
+    merge_spans = merge_spans or css_classes
 
 
-    # --- compute current generation number for this node ---
+    # --- generation of this node, resolved once per build by resolve_generations ---
+    _ensure_generations([person])
     if current_gen is None:
-        # Prefer an explicit person.gen_number if present
-        gen_val = getattr(person, "gen_number", None)
-        if isinstance(gen_val, int):
-            current_gen = gen_val
-        else:
-            # Fallback: parse from the Python variable name (e.g. gopal_32 -> 32)
-            var_name = next((var for var, obj in globals().items() if obj is person), None)
-            m = re.search(r'_(\d+)', var_name) if var_name else None
-            if m:
-                current_gen = int(m.group(1))
-            else:
-                # Last resort: align to earliest_gen_number or default to 32
-                current_gen = earliest_gen_number if earliest_gen_number is not None else 32
+        current_gen = person.generation
 
     # --- Root indent offset based on earliest_gen_number ---
     indent_color_offset = 0
     if level == 0 and earliest_gen_number is not None:
-        def _root_gen(p):
-            gen = getattr(p, "gen_number", None)
-            if isinstance(gen, int) and 1 <= gen <= 100:
-                return gen
-            # fallback: try to recover the variable name and parse digits
-            var_name = None
-            for var, obj in globals().items():
-                if obj is p:
-                    var_name = var
-                    break
-            if var_name:
-                m = re.search(r'_(\d+)', var_name)
-                if m:
-                    return int(m.group(1))
-            # last resort: treat as earliest
-            return earliest_gen_number
-
-        root_gen = _root_gen(person)
-        root_offset = max(0, root_gen - earliest_gen_number)
+        root_offset = max(0, person.generation - earliest_gen_number)
         color_offset += root_offset
         if root_offset:
             # 4 spaces per level to match existing tree spacing
             prefix += "    " * root_offset
 
-    # Color palette
-    my_color = GENERATION_COLORS[(level + color_offset) % len(GENERATION_COLORS)]
+    font_size = tree_font_size(print_language)
+
+    # Explicit stack of pending nodes; children are pushed in reverse so they pop in order
+    stack = [(person, level, prefix, is_last, parent_color, vertical_color_map, current_gen)]
+    while stack:
+        entry = stack.pop()
+        if entry[0] is _SUBTREE_END:
+            cache.end(entry[1], entry[2])
+            continue
+        person, level, prefix, is_last, parent_color, vertical_color_map, current_gen = entry
+
+        if cache is not None:
+            # Everything besides the subtree's own content that changes how it is drawn
+            key = cache.key(person, (print_language, merge_spans, css_classes, level == 0, (level + color_offset) % len(GENERATION_COLORS),
+                                     prefix, is_last, parent_color, sorted(vertical_color_map.items()), current_gen))
+            spliced = cache.splice(key)
+            if spliced is not None:
+                yield from spliced
+                continue
+            stack.append((_SUBTREE_END, key, cache.begin()))
 
-    # Connector characters (skip for root level)
-    if level == 0:
-        connector = ""  # no connector for root
-    else:
-        connector = "└── " if is_last else "├── "
-
-    # --- TEXT OUTPUT ---
-    text_line = prefix + connector + person.name
-    text_lines.append(text_line)
-
-    # --- HTML OUTPUT (prefix with colored verticals) ---
-    html_prefix = ""
-    col_idx = 0  # Track which column in monospace the char is in
-    for char in prefix:
-        if char in ['│', '├', '└', '─']:
-            color = vertical_color_map.get(col_idx, parent_color or my_color)
-            html_prefix += f'<span style="color:{color}">{char}</span>'
+        # Color palette
+        my_color = GENERATION_COLORS[(level + color_offset) % len(GENERATION_COLORS)]
+
+        # Connector characters (skip for root level)
+        if level == 0:
+            connector = ""  # no connector for root
         else:
-            html_prefix += char
-        col_idx += 1
+            connector = "└── " if is_last else "├── "
+
+        # --- TEXT OUTPUT ---
+        text_line = prefix + connector + person.name
 
-    # Add connector and name
-    connector_html = ''.join(f'<span style="color:{parent_color or my_color}">{c}</span>' for c in connector)
+        # --- HTML OUTPUT (prefix with colored verticals) ---
+        if merge_spans:
+            col_idx = len(prefix)
+            html_prefix = _merged_connector_html(prefix, connector, vertical_color_map, parent_color or my_color)
+            connector_html = ""
+        else:
+            html_prefix = ""
+            col_idx = 0  # Track which column in monospace the char is in
+            for char in prefix:
+                if char in ['│', '├', '└', '─']:
+                    color = vertical_color_map.get(col_idx, parent_color or my_color)
+                    html_prefix += f'<span style="color:{color}">{char}</span>'
+                else:
+                    html_prefix += char
+                col_idx += 1
+
+            # Add connector and name
+            connector_html = ''.join(f'<span style="color:{parent_color or my_color}">{c}</span>' for c in connector)
+
+        # Display name (EN/NP) + optional place/year
+        print_words = _tree_label(person, print_language)
+
+        # Parent / grandparent data attributes
+        father = person.father
+        grandfather = person.grandfather
+        father_name = father.name if father else ""
+        grandfather_name = grandfather.name if grandfather else ""
+
+        # Styling of the name / note links / bare edit marks: inline, or classes from tree_class_css()
+        if css_classes:
+            color_class = GENERATION_COLOR_CLASSES[my_color]
+            name_style = f'class="nm {color_class}"'
+            note_style = f'class="cm {color_class}" title="View note"'
+            mark_style = f'class="mk {color_class}"'
+        else:
+            name_style = f'style="color:{my_color}; font-size:{font_size}px"'
+            note_style = f'class="cm" style="color:{my_color}" title="View note"   '
+            mark_style = f'style="color:{my_color}; font-weight:bold"'
+
+        # Base label HTML
+        name_html = (
+            f'<span {name_style} '
+            f'data-name="{person.name}" data-father="{father_name}" '
+            f'data-grandfather="{grandfather_name}" data-gen_number="{current_gen}">'
+            f'{print_words}</span>'
+        )
 
-    # Display name (EN/NP) + optional place/year
+        # Optional female icon
+        icon_src = "images/girl_icon_new2.png"
+        icon_html = ""
+        if getattr(person, "gender", "") == "Female":
+            icon_html = f'<img src="{icon_src}" class="icon" alt="Girl Icon">'
+
+        # Optional "edit" plus sign
+        plus_html = correction_html = ""
+        edit_mark, edit_note = _edit_note(person)
+        if edit_mark:
+            if edit_note:
+                esc = _escape_attr(edit_note)
+                mark_html = f' <a href="#" {note_style} data-cmt="{esc}">{edit_mark}</a>'
+            else:
+                mark_html = f' <span {mark_style}>{edit_mark}</span>'
+            if edit_mark == "+":
+                plus_html = mark_html
+            else:
+                correction_html = mark_html
+
+        # --- Comment asterisk (popup trigger) ---
+        comment_text = getattr(person, "comment", "") or ""
+        if comment_text.strip():
+            esc = _escape_attr(comment_text)
+            # Make the asterisk adopt the generation color
+            name_html += f' <a href="#" {note_style} data-cmt="{esc}">*</a>'
+
+        # Emit this line
+        html_line = f"<div>{html_prefix}{connector_html}{icon_html}{name_html}{plus_html}{correction_html}</div>"
+        if cache is not None:
+            cache.add(text_line, html_line)
+        yield text_line, html_line
+
+        # Prepare for children (copy-on-write: the map is shared with this node's siblings)
+        new_prefix = prefix + ("    " if is_last else "│   ")
+        if not is_last:
+            vertical_color_map = dict(vertical_color_map)
+            vertical_color_map[col_idx] = parent_color or my_color  # Extend vertical line with same color
+        elif col_idx in vertical_color_map:
+            vertical_color_map = dict(vertical_color_map)
+            del vertical_color_map[col_idx]  # Remove if no more verticals needed
+
+        child_count = len(person.children)
+        for i in range(child_count - 1, -1, -1):
+            stack.append((person.children[i], level + 1, new_prefix, i == child_count - 1,
+                          my_color, vertical_color_map, person.children[i].generation))
+
+# Stack marker closing a cached subtree's line range in iter_tree_lines
+_SUBTREE_END = object()
+
+# GENERATION_COLORS index of each color, for the .gN classes of generation_css()
+GENERATION_COLOR_CLASSES = {color: f"g{i}" for i, color in enumerate(GENERATION_COLORS)}
+
+def generation_css():
+    """One `.gN { color: ... }` rule per GENERATION_COLORS entry, for class-styled tree pages."""
+    return [f".{cls} {{ color: {color}; }}" for color, cls in GENERATION_COLOR_CLASSES.items()]
+
+def tree_class_css(print_language="en"):
+    """Rules for css_classes tree pages: the .gN colors, the name font size (.nm) and bare edit marks (.mk)."""
+    font_size = tree_font_size(print_language)
+    return generation_css() + [f".nm {{ font-size: {font_size}px; }}", ".mk { font-weight: bold; }"]
+
+def _merged_connector_html(prefix, connector, vertical_color_map, connector_color):
+    """
+    prefix + connector as HTML with each run of same-colored characters in one class span.
+    Spaces between verticals stay bare text; the connector's trailing space is in its span,
+    like the per-character version.
+    """
+    parts = []
+    run, run_color = "", None
+    for col_idx, char in enumerate(prefix + connector):
+        if col_idx >= len(prefix):
+            color = connector_color
+        elif char in ('│', '├', '└', '─'):
+            color = vertical_color_map.get(col_idx, connector_color)
+        else:
+            color = None
+        if color != run_color and run:
+            parts.append(f'<span class="{GENERATION_COLOR_CLASSES[run_color]}">{run}</span>' if run_color else run)
+            run = ""
+        run_color = color
+        run += char
+    if run:
+        parts.append(f'<span class="{GENERATION_COLOR_CLASSES[run_color]}">{run}</span>' if run_color else run)
+    return "".join(parts)
+
+def _tree_label(person, print_language):
+    """Name as drawn in the tree (EN/NP), plus "(place)" / "(birth year)" when known."""
     name = person.name if print_language == "en" else person.name_nep
     print_words = name or ""
     if person.place:
@@ -117,105 +459,462 @@ def print_tree(person, level=0, prefix="", is_last=True, print_language="en",
             print_words += f"{person.birth_year})"
         else:
             print_words += f"({person.birth_year})"
-
-    # Parent / grandparent data attributes
-    father = person.father
-    grandfather = person.grandfather
-    father_name = father.name if father else ""
-    grandfather_name = grandfather.name if grandfather else ""
-
-    # Font-size: Nepali slightly bigger
-    font_size = 24 if print_language == "en" else 28
-
-    # Base label HTML
-    name_html = (
-        f'<span style="color:{my_color}; font-size:{font_size}px" '
-        f'data-name="{person.name}" data-father="{father_name}" '
-        f'data-grandfather="{grandfather_name}" data-gen_number="{current_gen}">'
-        f'{print_words}</span>'
-    )
-
-    # Optional female icon
-    icon_src = "images/girl_icon_new2.png"
-    icon_html = ""
-    if getattr(person, "gender", "") == "Female":
-        icon_html = f'<img src="{icon_src}" class="icon" alt="Girl Icon">'
-
-    # --- Comment asterisk (popup trigger) ---
-    def _escape_attr(s: str) -> str:
-        # Basic HTML attr escape + newline to &#10; so JS getAttribute() yields real newlines
-        return (s.replace("&", "&amp;")
-                 .replace("<", "&lt;")
-                 .replace(">", "&gt;")
-                 .replace('"', "&quot;")
-                 .replace("\r\n", "\n")
-                 .replace("\n", "&#10;"))
-
-    # Optional "edit" plus sign
-    plus_html = correction_html = ""
-    if getattr(person, "edit", False) and len(person.edit):
-        edit = person.edit
-        if edit.strip().startswith("+"):
-            plus_comment = edit.strip().replace("+","").strip()
-            if plus_comment:
-                esc = _escape_attr(plus_comment)
-                plus_html += (
-                    f' <a href="#" class="cm" style="color:{my_color}" title="View note" '
-                    f'   data-cmt="{esc}">+</a>'
-                )
-            else:
-                plus_html += ' <span style="color:{0}; font-weight:bold">+</span>'.format(my_color)
-        elif edit.strip().startswith("#"):
-            correction_comment = edit.strip().replace("#", "").strip()
-            if correction_comment:
-                esc = _escape_attr(correction_comment)
-                correction_html += (
-                    f' <a href="#" class="cm" style="color:{my_color}" title="View note" '
-                    f'   data-cmt="{esc}">#</a>'
-                )
-            else:
-                correction_html += ' <span style="color:{0}; font-weight:bold">#</span>'.format(my_color)
-
-    comment_text = getattr(person, "comment", "") or ""
-    if comment_text.strip():
-        esc = _escape_attr(comment_text)
-        # Make the asterisk adopt the generation color
-        name_html += (
-            f' <a href="#" class="cm" style="color:{my_color}" title="View note" '
-            f'   data-cmt="{esc}">*</a>'
-        )
-
-    # Append this line
-    html_lines.append(f"<div>{html_prefix}{connector_html}{icon_html}{name_html}{plus_html}{correction_html}</div>")
-
-    # Prepare for children
-    new_prefix = prefix + ("    " if is_last else "│   ")
-    if not is_last:
-        vertical_color_map[col_idx] = parent_color or my_color  # Extend vertical line with same color
-    elif col_idx in vertical_color_map:
-        del vertical_color_map[col_idx]  # Remove if no more verticals needed
-
-    child_count = len(person.children)
-    for i, child in enumerate(person.children):
-        print_tree(child,
-                   level=level + 1,
-                   prefix=new_prefix,
-                   is_last=(i == child_count - 1),
-                   print_language=print_language,
-                   text_lines=text_lines,
-                   html_lines=html_lines,
-                   parent_color=my_color,
-                   vertical_color_map=vertical_color_map.copy(),
-                   earliest_gen_number=earliest_gen_number,
-                   color_offset=color_offset,
-                   current_gen=current_gen + 1)  # <-- NEW
+    return print_words
+
+def _edit_note(person):
+    """("+", note) for an added person, ("#", note) for a correction, else (None, None); note may be ""."""
+    edit = getattr(person, "edit", False)
+    if not edit or not len(edit):
+        return None, None
+    edit = edit.strip()
+    for mark in ("+", "#"):
+        if edit.startswith(mark):
+            return mark, edit.replace(mark, "").strip()
+    return None, None
+
+def _escape_attr(s: str) -> str:
+    # Basic HTML attr escape + newline to &#10; so JS getAttribute() yields real newlines
+    return (s.replace("&", "&amp;")
+             .replace("<", "&lt;")
+             .replace(">", "&gt;")
+             .replace('"', "&quot;")
+             .replace("\r\n", "\n")
+             .replace("\n", "&#10;"))
 
 def _strip_tags(html: str) -> str:
     """Minimal HTML tag stripper for plain-text export."""
     return re.sub(r"<[^>]+>", "", html)
 
+# ---- Icon, note-link and comment popup styles, shared by every tree page layout ----
+TREE_POPUP_STYLE = [
+    'img.icon { height: 1.2em; width: auto; vertical-align: -0.15em; margin-right: 0.35em; }',
+    'a.cm { text-decoration: none; font-weight: bold; margin-left: 0.25rem; cursor: pointer; }',
+    'a.cm:focus { outline: 2px solid #999; outline-offset: 2px; }',
+    '#comment-popup { position: fixed; z-index: 9999; display: none; display: inline-flex; align-items: center; width: auto; max-width: 70vw; padding: 8px 10px; '
+        'background: #fff; border: 1px solid #ccc; box-shadow: 0 6px 18px rgba(0,0,0,.15); '
+        'border-radius: 8px; font-size: 14px; line-height: 1.35; white-space: pre-wrap;}',
+    '#comment-popup .cp-body { display: inline;}',
+    '#comment-popup .cp-close { display: inline-block; margin-left: 10px; background: transparent; border: none; font-size: 16px; cursor: pointer; line-height: 1; }',
+]
+
+# ---- HTML prolog (mirrors your export_tree header & styles) ----
+TREE_HTML_PROLOG = [
+    '<html><head><meta charset="UTF-8">',
+    '<style>',
+    'div { font-family: monospace; font-size: 20px; white-space: pre; }',
+    *TREE_POPUP_STYLE,
+    '</style>',
+    '</head><body>'
+]
+
+# ---- Shared popup scripts (same as export_tree) ----
+TREE_HTML_EPILOG = [
+    '<div id="comment-popup" role="dialog" aria-modal="true" aria-label="Note">',
+    '  <div class="cp-body"></div>',
+    '  <button class="cp-close" aria-label="Close">×</button>',
+    '</div>',
+    '<script>',
+    '(function(){',
+    '  const popup = document.getElementById("comment-popup");',
+    '  const body = popup.querySelector(".cp-body");',
+    '  const closeBtn = popup.querySelector(".cp-close");',
+    '  let openFrom = null;',
+    '  function closePopup(){ popup.style.display="none"; openFrom=null; }',
+    '  function openPopup(anchor, text){',
+    '    body.textContent = text || "";',
+    '    popup.style.display = "block";',
+    '    const r = anchor.getBoundingClientRect();',
+    '    const pad = 8;',
+    '    let top = r.bottom + pad, left = r.left;',
+    '    const vw = Math.max(document.documentElement.clientWidth, window.innerWidth || 0);',
+    '    const vh = Math.max(document.documentElement.clientHeight, window.innerHeight || 0);',
+    '    const pw = popup.offsetWidth, ph = popup.offsetHeight;',
+    '    if (left + pw + pad > vw) left = vw - pw - pad;',
+    "    if (top + ph + pad > vh) top = r.top - ph - pad;",
+    '    if (top < pad) top = pad;',
+    '    if (left < pad) left = pad;',
+    '    popup.style.top = Math.round(top) + "px";',
+    '    popup.style.left = Math.round(left) + "px";',
+    '    openFrom = anchor;',
+    '  }',
+    '  document.addEventListener("click", function(e){',
+    '    const a = e.target.closest("a.cm");',
+    '    if (a){',
+    '      e.preventDefault();',
+    '      const txt = a.getAttribute("data-cmt") || "";',
+    '      if (popup.style.display==="block" && openFrom===a) { closePopup(); }',
+    '      else { openPopup(a, txt); }',
+    '      e.stopPropagation();',
+    '      return;',
+    '    }',
+    '    if (popup.style.display==="block" && !e.target.closest("#comment-popup")) closePopup();',
+    '  }, true);',
+    '  closeBtn.addEventListener("click", function(e){ e.preventDefault(); closePopup(); });',
+    '  ["scroll","keydown","resize"].forEach(evt => window.addEventListener(evt, closePopup, {passive:true}));',
+    '  document.addEventListener("visibilitychange", function(){ if (document.hidden) closePopup(); });',
+    '  document.addEventListener("input", closePopup, true);',
+    '})();',
+    '</script>',
+    '</body></html>'
+]
+
+# Write buffer for streamed tree exports
+STREAM_BUFFER_SIZE = 1 << 16
+
+class LineWriter:
+    """Write lines to a file one at a time, joined by newlines exactly like "\n".join(lines)."""
+    def __init__(self, f):
+        self.f = f
+        self.first = True
+
+    def write_line(self, line):
+        if self.first:
+            self.first = False
+        else:
+            self.f.write("\n")
+        self.f.write(line)
+
+# ---- Sharded tree pages (export_roots_trees(..., shard_generation=N)) ----
+TREE_SHARD_STYLE = [
+    '<style>',
+    'div.shard { white-space: normal; }',
+    'a.shard-toggle { text-decoration: none; font-size: 16px; margin-left: 0.5rem; color: #555; cursor: pointer; }',
+    '</style>',
+]
+
+# Loader for the shards; `treeShards` ([{src, count, names}], one per shard) is written just before it
+TREE_SHARD_SCRIPT = [
+    '(function(){',
+    '  const loading = {};',
+    '  function loadShard(i){',
+    '    if (!loading[i]) {',
+    '      loading[i] = fetch(treeShards[i].src)',
+    '        .then(r => { if (!r.ok) throw new Error(treeShards[i].src + ": " + r.status); return r.text(); })',
+    '        .then(html => { document.getElementById("shard-" + i).innerHTML = html; })',
+    '        .catch(err => { delete loading[i]; throw err; });',
+    '    }',
+    '    return loading[i];',
+    '  }',
+    '  function showShard(i, open){',
+    '    return loadShard(i).then(() => {',
+    '      document.getElementById("shard-" + i).hidden = !open;',
+    '      const toggle = document.querySelector(\'a.shard-toggle[data-shard="\' + i + \'"]\');',
+    '      toggle.textContent = (open ? "▾ " : "▸ ") + treeShards[i].count;',
+    '    });',
+    '  }',
+    '  document.addEventListener("click", function(e){',
+    '    const a = e.target.closest("a.shard-toggle");',
+    '    if (!a) return;',
+    '    e.preventDefault();',
+    '    const i = Number(a.dataset.shard);',
+    '    showShard(i, document.getElementById("shard-" + i).hidden);',
+    '  });',
+    '  // index.html\'s search calls this before looking a person up: opens every shard with that data-name',
+    '  window.loadShardsFor = function(name){',
+    '    const wanted = [];',
+    '    treeShards.forEach((shard, i) => { if (shard.names.includes(name)) wanted.push(i); });',
+    '    return Promise.all(wanted.map(i => showShard(i, true)));',
+    '  };',
+    '})();',
+]
+
+def _preorder(person):
+    """People of this subtree in iter_tree_lines' order (someone attached under two parents comes twice)."""
+    stack = [person]
+    while stack:
+        person = stack.pop()
+        yield person
+        stack.extend(reversed(person.children))
+
+class TreeSharder:
+    """
+    Splits a tree page's HTML lines into a light skeleton page plus lazily loaded shards.
+
+    Everyone above `generation` stays in the skeleton. Each person at `generation` (or a root
+    below it) who has children is a shard root: their own line stays in the skeleton with a
+    ▸ toggle, and their descendants' lines go to one fragment file in `shard_dir`, which the
+    page fetches when the toggle is clicked or when index.html's search looks for someone in it.
+    """
+    def __init__(self, generation, shard_dir):
+        self.generation = generation
+        self.shard_dir = shard_dir
+        self.shards = []  # [(html lines, names)] per shard
+        self._left = 0    # lines still belonging to the open shard
+
+    def route(self, person, html_line, emit_html):
+        """Send one rendered line (of `person`) to the skeleton or to the open shard."""
+        if self._left:
+            self._left -= 1
+            lines, names = self.shards[-1]
+            lines.append(html_line)
+            names.add(person.name)
+            return
+        if person.generation >= self.generation and person.children:
+            shard = len(self.shards)
+            self._left = sum(1 for _ in _preorder(person)) - 1
+            self.shards.append(([], set()))
+            toggle = (f' <a href="#" class="shard-toggle" data-shard="{shard}" '
+                      f'title="Show descendants">▸ {self._left}</a>')
+            emit_html(html_line[:-len("</div>")] + toggle + "</div>")
+            emit_html(f'<div class="shard" id="shard-{shard}" hidden></div>')
+        else:
+            emit_html(html_line)
+
+    def finish(self, emit_html):
+        """Write the shard files (removing ones left from an earlier build) and emit the page's loader."""
+        os.makedirs(self.shard_dir, exist_ok=True)
+        table = []
+        written = set()
+        for shard, (lines, names) in enumerate(self.shards):
+            name = f"{shard:02d}.html"
+            with open(os.path.join(self.shard_dir, name), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+            written.add(name)
+            table.append({"src": f"{os.path.basename(self.shard_dir)}/{name}", "count": len(lines),
+                          "names": sorted(names)})
+        for path in glob.glob(os.path.join(self.shard_dir, "*.html")):
+            if os.path.basename(path) not in written:
+                os.remove(path)
+
+        for line in TREE_SHARD_STYLE:
+            emit_html(line)
+        emit_html("<script>")
+        table_json = json.dumps(table, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+        emit_html(f"const treeShards = {table_json};")
+        for line in TREE_SHARD_SCRIPT:
+            emit_html(line)
+        emit_html("</script>")
+
+def tree_shard_dir(out_html_path):
+    """Where the shards of a sharded tree page go: sisneri_poudel_tree_np.html -> sisneri_poudel_tree_np_shards/"""
+    return os.path.splitext(out_html_path)[0] + "_shards"
+
+# ---- Virtualized tree pages (export_tree_rows) ----
+# One row per line of the tree page, as a JSON array in this order:
+#   mask       "0"/"1" per indent cell before the connector, "1" where a │ continues; a │ or connector
+#              in cell k is drawn in GENERATION_COLORS[(k - 1) % len], the parent's color, as in iter_tree_lines
+#   connector  0 for a root, 1 for ├──, 2 for └──
+#   color      GENERATION_COLORS index of the name
+#   label, flags (ROW_FEMALE), edit ("+" / "#" or None), note (edit note), comment,
+#   gen, parent (row of the parent, -1 for a root), name, father, grandfather (the data-* values)
+TREE_ROW_FIELDS = ("mask", "connector", "color", "label", "flags", "edit", "note", "comment",
+                   "gen", "parent", "name", "father", "grandfather")
+ROW_FEMALE = 1
+
+def iter_tree_rows(person, print_language="en", earliest_gen_number=None, first_row=0):
+    """
+    Yield the tree as compact rows (see TREE_ROW_FIELDS), one per person, in the same order and
+    layout as iter_tree_lines but without any markup; export_tree_rows turns them into a page
+    that only draws the rows on screen.
+
+    :param first_row: row number of `person`, so `parent` stays right when several roots share a page.
+    """
+    _ensure_generations([person])
+    root_offset = 0
+    if earliest_gen_number is not None:
+        root_offset = max(0, person.generation - earliest_gen_number)
+    stack = [(person, 0, "0" * root_offset, True, -1)]
+    row = first_row
+    while stack:
+        person, level, mask, is_last, parent = stack.pop()
+        father = person.father
+        grandfather = person.grandfather
+        edit_mark, edit_note = _edit_note(person)
+        comment = getattr(person, "comment", "") or ""
+        yield [
+            mask,
+            0 if level == 0 else (2 if is_last else 1),
+            len(mask) % len(GENERATION_COLORS),
+            _tree_label(person, print_language),
+            ROW_FEMALE if getattr(person, "gender", "") == "Female" else 0,
+            edit_mark,
+            edit_note or None,
+            comment if comment.strip() else None,
+            person.generation,
+            parent,
+            person.name,
+            father.name if father else "",
+            grandfather.name if grandfather else "",
+        ]
+        child_mask = mask + ("0" if is_last else "1")
+        child_count = len(person.children)
+        for i in range(child_count - 1, -1, -1):
+            stack.append((person.children[i], level + 1, child_mask, i == child_count - 1, row))
+        row += 1
+
+def tree_row_text(row):
+    """The .txt line of a row, identical to iter_tree_lines' text_line."""
+    mask, connector = row[0], row[1]
+    return ("".join("│   " if cell == "1" else "    " for cell in mask)
+            + ("", "├── ", "└── ")[connector] + row[TREE_ROW_FIELDS.index("name")])
+
+# Viewer page for the rows: an empty spacer as tall as the whole tree, and only the rows in (or near)
+# the viewport drawn into it, so page memory and scroll cost don't grow with the tree.
+TREE_VIEWER_STYLE = [
+    '<style>',
+    'body { margin: 8px; }',
+    '#tree { position: relative; font-family: monospace; font-size: 20px; }',
+    '#tree .row { position: absolute; left: 0; white-space: pre; height: var(--row-h); line-height: var(--row-h); }',
+    '.match { background-color: yellow; border: 3px solid orange; }',
+    '.ancestor { font-weight: bold; }',
+    '.gen-badge { display: inline-block; min-width: 1.6em; margin-left: .35em; border-radius: 9999px; '
+        'background: #1abc9c; text-align: center; font: 700 18px/1.6 system-ui, sans-serif; }',
+    *TREE_POPUP_STYLE,
+    '</style>',
+]
+
+TREE_VIEWER_SCRIPT = [
+    '(function(){',
+    '  const OVERSCAN = 20;',
+    '  const tree = document.getElementById("tree");',
+    '  const rowHeight = parseFloat(getComputedStyle(tree).getPropertyValue("--row-h"));',
+    '  tree.style.height = treeRows.length * rowHeight + "px";',
+    '  let drawn = [-1, -1], match = -1, ancestors = new Set();',
+    '',
+    '  function span(text, color){',
+    '    const el = document.createElement("span");',
+    '    el.textContent = text;',
+    '    el.style.color = color;',
+    '    return el;',
+    '  }',
+    '  function noteLink(mark, note, color){',
+    '    const el = document.createElement("a");',
+    '    el.href = "#"; el.className = "cm"; el.title = "View note"; el.style.color = color;',
+    '    el.textContent = mark; el.setAttribute("data-cmt", note);',
+    '    return el;',
+    '  }',
+    '  function drawRow(i){',
+    '    const [mask, connector, color, label, flags, edit, note, comment, gen, , name, father, grandfather] = treeRows[i];',
+    '    const div = document.createElement("div");',
+    '    div.className = "row";',
+    '    div.style.top = i * rowHeight + "px";',
+    '    for (let k = 0; k < mask.length; k++) {',
+    '      if (mask[k] === "1") { div.appendChild(span("│", treeColors[(k - 1) % treeColors.length])); div.append("   "); }',
+    '      else div.append("    ");',
+    '    }',
+    '    if (connector) div.appendChild(span(connector === 2 ? "└── " : "├── ", treeColors[(mask.length - 1) % treeColors.length]));',
+    '    if (flags & 1) {',
+    '      const img = document.createElement("img");',
+    '      img.src = "images/girl_icon_new2.png"; img.className = "icon"; img.alt = "Girl Icon";',
+    '      div.appendChild(img);',
+    '    }',
+    '    const nameColor = treeColors[color];',
+    '    const el = span(label, nameColor);',
+    '    el.style.fontSize = treeFontSize + "px";',
+    '    el.dataset.name = name; el.dataset.father = father; el.dataset.grandfather = grandfather;',
+    '    el.dataset.gen_number = gen;',
+    '    if (i === match) el.className = "match";',
+    '    else if (ancestors.has(i)) el.className = "ancestor";',
+    '    div.appendChild(el);',
+    '    if (i === match) {',
+    '      div.append(" ✅");',
+    '      const badge = span(String(gen), nameColor);',
+    '      badge.className = "gen-badge";',
+    '      div.appendChild(badge);',
+    '    }',
+    '    if (comment) { div.append(" "); div.appendChild(noteLink("*", comment, nameColor)); }',
+    '    if (edit) {',
+    '      div.append(" ");',
+    '      if (note) div.appendChild(noteLink(edit, note, nameColor));',
+    '      else { const mark = span(edit, nameColor); mark.style.fontWeight = "bold"; div.appendChild(mark); }',
+    '    }',
+    '    return div;',
+    '  }',
+    '  function draw(force){',
+    '    const top = window.scrollY - tree.offsetTop;',
+    '    const first = Math.max(0, Math.floor(top / rowHeight) - OVERSCAN);',
+    '    const last = Math.min(treeRows.length, Math.ceil((top + window.innerHeight) / rowHeight) + OVERSCAN);',
+    '    if (!force && first === drawn[0] && last === drawn[1]) return;',
+    '    drawn = [first, last];',
+    '    const frag = document.createDocumentFragment();',
+    '    for (let i = first; i < last; i++) frag.appendChild(drawRow(i));',
+    '    tree.replaceChildren(frag);',
+    '  }',
+    '  let pending = false;',
+    '  function schedule(){',
+    '    if (pending) return;',
+    '    pending = true;',
+    '    requestAnimationFrame(() => { pending = false; draw(false); });',
+    '  }',
+    '  window.addEventListener("scroll", schedule, {passive: true});',
+    '  window.addEventListener("resize", schedule, {passive: true});',
+    '',
+    '  function findRow(name, father, grand){',
+    '    const tries = [r => r[10] === name && r[11] === (father || "") && r[12] === (grand || ""),',
+    '                   r => father && r[10] === name && r[11] === father,',
+    '                   r => r[10] === name];',
+    '    for (const test of tries) {',
+    '      const i = treeRows.findIndex(test);',
+    '      if (i >= 0) return i;',
+    '    }',
+    '    return -1;',
+    '  }',
+    '  // index.html\'s search calls these instead of styling DOM nodes, which come and go while scrolling.',
+    '  // Returns the generation of the person found, or null.',
+    '  window.highlightPerson = function(name, father, grand){',
+    '    match = findRow(name, father, grand);',
+    '    ancestors = new Set();',
+    '    if (match < 0) { draw(true); return null; }',
+    '    for (let i = treeRows[match][9]; i >= 0; i = treeRows[i][9]) ancestors.add(i);',
+    '    window.scrollTo({top: tree.offsetTop + match * rowHeight - window.innerHeight / 2, behavior: "smooth"});',
+    '    draw(true);',
+    '    return treeRows[match][8];',
+    '  };',
+    '  window.clearPersonHighlight = function(){ match = -1; ancestors = new Set(); draw(true); };',
+    '  draw(true);',
+    '})();',
+]
+
+def tree_rows_page_lines(rows, print_language):
+    """HTML lines of the virtualized viewer page for `rows` (no trailing TREE_HTML_EPILOG)."""
+    font_size = tree_font_size(print_language)
+    row_height = font_size + 10
+    width = max((4 * (len(r[0]) + bool(r[1])) + len(r[3]) + 6 for r in rows), default=0)
+    rows_json = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    return ['<html><head><meta charset="UTF-8">', *TREE_VIEWER_STYLE, '</head><body>',
+            f'<div id="tree" style="--row-h:{row_height}px; min-width:{width}ch"></div>',
+            '<script>',
+            f'const treeColors = {json.dumps(GENERATION_COLORS)};',
+            f'const treeFontSize = {font_size};',
+            f'const treeRows = {rows_json};',
+            *TREE_VIEWER_SCRIPT,
+            '</script>']
+
+def export_tree_rows(roots, print_language="en", out_html_path=None, out_txt_path=None):
+    """
+    Like export_roots_trees, but the HTML page is the virtualized viewer: the tree is shipped as
+    one JSON row table (iter_tree_rows) and only the rows in view exist in the DOM, so a
+    tree of any size costs about the same page memory and scroll time. The TXT file is identical
+    to export_roots_trees'. Roots are separated by an empty row instead of an <hr>.
+    """
+    _ensure_generations(roots)
+    earliest_gen_number = min(root.generation for root in roots) if roots else None
+    lang = print_language
+    if out_html_path is None:
+        out_html_path = f"sisneri_poudel_tree_{lang}.html"
+    if out_txt_path is None:
+        out_txt_path = f"sisneri_poudel_tree_{lang}.txt"
+
+    rows = []
+    text_lines = []
+    for idx, root in enumerate(roots):
+        for row in iter_tree_rows(root, print_language=lang, earliest_gen_number=earliest_gen_number,
+                                  first_row=len(rows)):
+            rows.append(row)
+            text_lines.append(tree_row_text(row))
+        if idx < len(roots) - 1:
+            rows.append(["", 0, 0, "", 0, None, None, None, None, -1, "", "", ""])
+            text_lines.append("\n" + ("=" * 40) + "\n")
+
+    with open(out_txt_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(text_lines))
+    with open(out_html_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(tree_rows_page_lines(rows, lang) + TREE_HTML_EPILOG))
+    print(f"✅ {out_html_path} (virtualized, {len(rows)} rows) and {out_txt_path} generated")
+
 def export_roots_trees(roots, print_language="en",
-                       out_html_path=None, out_txt_path=None):
+                       out_html_path=None, out_txt_path=None, stream=False, cache=None,
+                       shard_generation=None, merge_spans=False, css_classes=False):
     """
     Export multiple root trees into ONE HTML and ONE TXT file, in order.
 
@@ -227,46 +926,25 @@ def export_roots_trees(roots, print_language="en",
         - sisneri_poudel_tree_np.txt
 
     where Bishwamvar's full tree follows Gopal's full tree.
-    """
 
-    def get_var_name(obj, namespace=None):
-        if namespace is None:
-            namespace = globals()
-        return [name for name, val in namespace.items() if val is obj]
+    With stream=True the lines are written to disk as print_tree produces them,
+    instead of being collected and joined in memory first; the files are identical.
 
-    def get_earliest_generation(roots):
-        """
-        Given a list of Person objects, determine the earliest (minimum) generation number.
-        - If gen_number exists and is an integer between 1 and 100, use it.
-        - Otherwise, extract from the variable name (e.g., gopal_32 -> 32, hari_33_1 -> 33).
+    Pass a genealogy_cache.TreeRenderCache as `cache` to splice unchanged subtrees
+    from the previous build (the caller saves it afterwards).
 
-        Args:
-            roots (list): list of Person objects
+    With shard_generation=N the HTML page is only a skeleton down to generation N; every branch
+    below it is written to its own file in tree_shard_dir(out_html_path) and fetched by the page
+    when the branch is expanded or searched (see TreeSharder). The TXT file is always complete.
 
-        Returns:
-            int: the minimum generation number found
-        """
-        gen_numbers = []
-
-        for person in roots:
-            gen_num = getattr(person, "gen_number", None)
-            if isinstance(gen_num, int) and 1 <= gen_num <= 100:
-                gen_numbers.append(gen_num)
-            else:
-                # Fallback: extract digits after first underscore from variable name
-                var_name = get_var_name(person)[0]
-                if var_name is None:
-                    raise ValueError(f"No gen_number and no variable name for {person}")
-
-                match = re.search(r'_(\d+)', var_name)
-                if match:
-                    gen_numbers.append(int(match.group(1)))
-                else:
-                    raise ValueError(f"Could not determine generation number for {var_name}")
-
-        return min(gen_numbers) if gen_numbers else None
+    merge_spans=True draws the connectors with run-length merged `.gN` class spans (see
+    iter_tree_lines); the page gets the generation_css() rules and renders the same.
+    css_classes=True goes further: every color and the name font size come from one
+    tree_class_css() block in the page head, and the lines only carry class names.
+    """
 
-    earliest_gen_number = get_earliest_generation(roots)
+    _ensure_generations(roots)
+    earliest_gen_number = min(root.generation for root in roots) if roots else None
 
     lang = print_language
     if out_html_path is None:
@@ -274,118 +952,365 @@ def export_roots_trees(roots, print_language="en",
     if out_txt_path is None:
         out_txt_path = f"sisneri_poudel_tree_{lang}.txt"
 
-    # ---- HTML prolog (mirrors your export_tree header & styles) ----
-    html_lines = [
-        '<html><head><meta charset="UTF-8">',
-        '<style>',
-        'div { font-family: monospace; font-size: 20px; white-space: pre; }',
-        'img.icon { height: 1.2em; width: auto; vertical-align: -0.15em; margin-right: 0.35em; }',
-        'a.cm { text-decoration: none; font-weight: bold; margin-left: 0.25rem; cursor: pointer; }',
-        'a.cm:focus { outline: 2px solid #999; outline-offset: 2px; }',
-        '#comment-popup { position: fixed; z-index: 9999; display: none; display: inline-flex; align-items: center; width: auto; max-width: 70vw; padding: 8px 10px; '
-            'background: #fff; border: 1px solid #ccc; box-shadow: 0 6px 18px rgba(0,0,0,.15); '
-            'border-radius: 8px; font-size: 14px; line-height: 1.35; white-space: pre-wrap;}',
-        '#comment-popup .cp-body { display: inline;}',
-        '#comment-popup .cp-close { display: inline-block; margin-left: 10px; background: transparent; border: none; font-size: 16px; cursor: pointer; line-height: 1; }',
-        '</style>',
-        '</head><body>'
-    ]
+    sharder = TreeSharder(shard_generation, tree_shard_dir(out_html_path)) if shard_generation is not None else None
+
+    def render(emit_html, emit_text):
+        for line in TREE_HTML_PROLOG:
+            if (merge_spans or css_classes) and line == '</style>':
+                for rule in tree_class_css(lang) if css_classes else generation_css():
+                    emit_html(rule)
+            emit_html(line)
+
+        # ---- For each root, render a section then append the full tree ----
+        for idx, root in enumerate(roots):
+            # Section heading (per language)
+            # root_title = (root.name_nep or root.name) if lang == "np" else (root.name or root.name_nep or "")
+            # heading_html = f"<h2 style='margin:10px 0 6px'>{escape(root_title)}</h2>"
+            # emit_html(heading_html)
+            # emit_text(root_title)
+
+            # Build colored/connected HTML prefix segments line by line
+            rows = _preorder(root) if sharder is not None else None
+            for text_line, html_line in iter_tree_lines(root, print_language=lang, level=0,
+                                                        earliest_gen_number=earliest_gen_number,
+                                                        cache=cache, merge_spans=merge_spans,
+                                                        css_classes=css_classes):
+                if rows is None:
+                    emit_html(html_line)
+                else:
+                    sharder.route(next(rows), html_line, emit_html)
+                emit_text(text_line)
+
+            # Divider between sections (except after the last)
+            if idx < len(roots) - 1:
+                emit_html('<hr style="margin:16px 0">')
+                emit_text("\n" + ("=" * 40) + "\n")
+
+        if sharder is not None:
+            sharder.finish(emit_html)
+        for line in TREE_HTML_EPILOG:
+            emit_html(line)
+
+    if stream:
+        # ---- Stream TXT & HTML to disk as lines are produced ----
+        with open(out_txt_path, "w", encoding="utf-8", buffering=STREAM_BUFFER_SIZE) as txt_file, \
+             open(out_html_path, "w", encoding="utf-8", buffering=STREAM_BUFFER_SIZE) as html_file:
+            render(LineWriter(html_file).write_line, LineWriter(txt_file).write_line)
+    else:
+        html_lines = []
+        text_lines = []
+        render(html_lines.append, text_lines.append)
 
-    text_lines = []
+        # ---- Write combined TXT & HTML ----
+        with open(out_txt_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(text_lines))
 
-    # ---- For each root, render a section then append the full tree ----
-    for idx, root in enumerate(roots):
-        # Section heading (per language)
-        # root_title = (root.name_nep or root.name) if lang == "np" else (root.name or root.name_nep or "")
-        # heading_html = f"<h2 style='margin:10px 0 6px'>{escape(root_title)}</h2>"
-        # html_lines.append(heading_html)
-        # text_lines.append(root_title)
-
-        # Render this root exactly like export_tree does (re-using your print_tree)
-        section_text = []
-        section_html = []
-
-        # Build colored/connected HTML prefix segments using your existing print_tree
-        print_tree(
-            root,
-            print_language=lang,
-            text_lines=section_text,
-            html_lines=section_html,
-            level=0,
-            earliest_gen_number=earliest_gen_number
-        )
+        with open(out_html_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(html_lines))
 
-        # Append tree to combined outputs
-        html_lines.extend(section_html)
-        text_lines.extend(section_text)
+    print(f"✅ {out_html_path} and {out_txt_path} generated (order: {', '.join(r.name for r in roots) if print_language=='en' else ', '.join(r.name_nep for r in roots)})")
+    if sharder is not None:
+        print(f"✅ {len(sharder.shards)} branches below generation {shard_generation} written to {sharder.shard_dir}/")
+    return out_html_path, out_txt_path
 
-        # Divider between sections (except after the last)
-        if idx < len(roots) - 1:
-            html_lines.append('<hr style="margin:16px 0">')
-            text_lines.append("\n" + ("=" * 40) + "\n")
+def _search_norm_en(s):
+    """Python twin of normEN() in index.html: NFC, drop (...) parts and non-word chars, lowercase."""
+    s = unicodedata.normalize("NFC", s)
+    s = re.sub(r"\(.*?\)", "", s)
+    s = re.sub(r"[^A-Za-z0-9_]", "", s)  # JS \w without the u flag is ASCII-only
+    return s.lower().strip()
 
-    # ---- Shared popup scripts (same as export_tree) ----
-    html_lines += [
-        '<div id="comment-popup" role="dialog" aria-modal="true" aria-label="Note">',
-        '  <div class="cp-body"></div>',
-        '  <button class="cp-close" aria-label="Close">×</button>',
-        '</div>',
-        '<script>',
-        '(function(){',
-        '  const popup = document.getElementById("comment-popup");',
-        '  const body = popup.querySelector(".cp-body");',
-        '  const closeBtn = popup.querySelector(".cp-close");',
-        '  let openFrom = null;',
-        '  function closePopup(){ popup.style.display="none"; openFrom=null; }',
-        '  function openPopup(anchor, text){',
-        '    body.textContent = text || "";',
-        '    popup.style.display = "block";',
-        '    const r = anchor.getBoundingClientRect();',
-        '    const pad = 8;',
-        '    let top = r.bottom + pad, left = r.left;',
-        '    const vw = Math.max(document.documentElement.clientWidth, window.innerWidth || 0);',
-        '    const vh = Math.max(document.documentElement.clientHeight, window.innerHeight || 0);',
-        '    const pw = popup.offsetWidth, ph = popup.offsetHeight;',
-        '    if (left + pw + pad > vw) left = vw - pw - pad;',
-        "    if (top + ph + pad > vh) top = r.top - ph - pad;",
-        '    if (top < pad) top = pad;',
-        '    if (left < pad) left = pad;',
-        '    popup.style.top = Math.round(top) + "px";',
-        '    popup.style.left = Math.round(left) + "px";',
-        '    openFrom = anchor;',
-        '  }',
-        '  document.addEventListener("click", function(e){',
-        '    const a = e.target.closest("a.cm");',
-        '    if (a){',
-        '      e.preventDefault();',
-        '      const txt = a.getAttribute("data-cmt") || "";',
-        '      if (popup.style.display==="block" && openFrom===a) { closePopup(); }',
-        '      else { openPopup(a, txt); }',
-        '      e.stopPropagation();',
-        '      return;',
-        '    }',
-        '    if (popup.style.display==="block" && !e.target.closest("#comment-popup")) closePopup();',
-        '  }, true);',
-        '  closeBtn.addEventListener("click", function(e){ e.preventDefault(); closePopup(); });',
-        '  ["scroll","keydown","resize"].forEach(evt => window.addEventListener(evt, closePopup, {passive:true}));',
-        '  document.addEventListener("visibilitychange", function(){ if (document.hidden) closePopup(); });',
-        '  document.addEventListener("input", closePopup, true);',
-        '})();',
-        '</script>',
-        '</body></html>'
-    ]
-
-    # ---- Write combined TXT & HTML ----
-    with open(out_txt_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(text_lines))
+def _search_norm_np(s):
+    """Python twin of normNP() in index.html: NFC, keep only Devanagari."""
+    return re.sub(r"[^\u0900-\u097F]", "", unicodedata.normalize("NFC", s)).strip()
 
-    with open(out_html_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(html_lines))
+# Record fields that identify a person in index.html's getExactRecordFlex, most significant first
+SEARCH_TUPLE_FIELDS = ("name", "father", "grandfather", "ggfather")
 
-    print(f"✅ {out_html_path} and {out_txt_path} generated (order: {', '.join(r.name for r in roots) if print_language=='en' else ', '.join(r.name_nep for r in roots)})")
-    return out_html_path, out_txt_path
+def build_search_index(records):
+    """
+    Prebuilt search index for index.html over the merged genealogyData records. Keys are NFC-normalized,
+    like normEN / normNP in the page, so both sides compare the same strings.
+
+      en / np           : normEN(name) / normNP(name_nep) for every record, so typing never re-normalizes
+      enSorted/npSorted : record indices ordered by those keys, for binary-searched prefix matches
+                          (the page shows them back in record order, i.e. tree order)
+      byTuple           : record indices ordered by (name, father, grandfather, ggfather); any leading
+                          2/3/4-part tuple is a contiguous range, so exact lookups are two binary searches
+
+    Keys are ASCII or Devanagari (BMP), so Python's string order matches JS's `<` comparisons.
+    """
+    en = [_search_norm_en(str(r["name"] or "")) for r in records]
+    np = [_search_norm_np(str(r["name_nep"] or "")) for r in records]
+
+    def tuple_key(i):
+        return tuple(str(records[i][field] or "").strip() for field in SEARCH_TUPLE_FIELDS)
+
+    order = range(len(records))
+    return {
+        "en": en,
+        "np": np,
+        "enSorted": sorted(order, key=en.__getitem__),
+        "npSorted": sorted(order, key=np.__getitem__),
+        "byTuple": sorted(order, key=tuple_key),
+    }
+
+def flatten_person(person):
+    """
+    Yield a flat dict per person of this subtree in pre-order, tagging each with gen_number
+    (the person's resolved generation, see resolve_generations). Also preserves
+    father/grandfather/ggfather (en/nep).
+
+    Walks with an explicit stack, so no record is copied into its ancestors' lists and deep
+    trees can't hit the recursion limit. A child's ancestor names are taken from its parent's
+    record; only a person whose father link isn't the parent it's listed under (attached
+    under two parents) has its names looked up through the links.
+    """
+    _ensure_generations([person])
+    stack = [(person, None, None)]
+    while stack:
+        person, parent, parent_entry = stack.pop()
+        father = person.father
+        if father is not None and father is parent:
+            entry = {
+                "name": person.name,
+                "name_nep": person.name_nep,
+                "birth_year": person.birth_year,
+                "gen_number": person.generation,
+                "father": parent_entry["name"],
+                "grandfather": parent_entry["father"],
+                "ggfather": parent_entry["grandfather"],
+                "father_nep": parent_entry["name_nep"],
+                "grandfather_nep": parent_entry["father_nep"],
+                "ggfather_nep": parent_entry["grandfather_nep"],
+            }
+        else:
+            grandfather = father.father if father else None
+            ggfather = grandfather.father if grandfather else None
+            entry = {
+                "name": person.name,
+                "name_nep": person.name_nep,
+                "birth_year": person.birth_year,
+                "gen_number": person.generation,
+                "father": father.name if father else None,
+                "grandfather": grandfather.name if grandfather else None,
+                "ggfather": ggfather.name if ggfather else None,
+                "father_nep": father.name_nep if father else None,
+                "grandfather_nep": grandfather.name_nep if grandfather else None,
+                "ggfather_nep": ggfather.name_nep if ggfather else None,
+            }
+        yield entry
+        for child in reversed(person.children):
+            stack.append((child, person, entry))
+
+EXTERNAL_DATA_GLOB = "genealogy_data.*.json*"
+
+def write_external_data(payload, out_dir="."):
+    """
+    Write the index.html data payload to genealogy_data.<hash>.json, plus precompressed
+    .gz / .br siblings for servers that can serve them directly (nginx gzip_static, brotli_static...).
+
+    The name carries a hash of the content, so the file can be cached forever and only changes
+    when the data does. Each file is written atomically, and older genealogy_data.*.json* files
+    are left in place: index.html still points at one of them until it is replaced, so pruning
+    waits for that (prune_external_data).
+
+    :return: the file name (relative to out_dir), for index.html to reference.
+    """
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    name = f"genealogy_data.{hashlib.sha256(data).hexdigest()[:12]}.json"
+    path = os.path.join(out_dir, name)
+
+    outputs = {path: data, path + ".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        outputs[path + ".br"] = brotli.compress(data, quality=11)
+    else:
+        print(f"⚠️  brotli not installed, {name}.br not written (pip install brotli)")
+
+    for out_path, content in outputs.items():
+        write_atomic(out_path, content)
+
+    sizes = ", ".join(f"{os.path.splitext(p)[1]} {len(c) // 1024} KB" for p, c in outputs.items())
+    print(f"✅ {name} written ({sizes}).")
+    return name
+
+def prune_external_data(keep, out_dir="."):
+    """
+    Remove genealogy_data.<hash>.json files (and their .gz / .br copies) in out_dir whose name
+    isn't in `keep`. Call it only once index.html references the new file; keeping the name the
+    previous index.html used lets browsers that still have that page cached load their data.
+
+    :return: list of removed paths.
+    """
+    removed = []
+    for path in sorted(glob.glob(os.path.join(out_dir, EXTERNAL_DATA_GLOB))):
+        name = re.sub(r"\.(gz|br)$", "", os.path.basename(path))
+        if name not in keep:
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+# Sizes and content hashes of the precompressed build artifacts (build_site(..., compress=True))
+COMPRESSION_MANIFEST = "compression_manifest.json"
+
+def precompress_file(path):
+    """
+    Write a maximum-level path.gz (deterministic: mtime=0) and, when brotli is installed, a
+    quality-11 path.br next to `path`, for hosts that serve precompressed siblings.
+
+    :return: (path, manifest entry {"sha256", "bytes", "gz_bytes", "br_bytes"}); br_bytes is None
+             without brotli.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    entry = {"sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data), "gz_bytes": None, "br_bytes": None}
+    compressed = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed[".br"] = brotli.compress(data, quality=11)
+    for ext, content in compressed.items():
+        with open(path + ext, "wb") as f:
+            f.write(content)
+        entry[ext[1:] + "_bytes"] = len(content)
+    return path, entry
+
+def compress_artifacts(paths, manifest_path=COMPRESSION_MANIFEST, parallel=True):
+    """
+    Precompress every file in `paths` (see precompress_file), skipping the ones whose content hash
+    matches the manifest from the last run and whose .gz / .br are still there. The changed files
+    are compressed concurrently (forked worker processes where available). Siblings of artifacts
+    that are gone (e.g. an old tree shard) are removed.
 
-def update_index_html_in_place(roots, index_path="index.html"):
+    The manifest records per file its sha256, size and compressed sizes, plus the totals.
+    :return: the manifest dict.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            previous = json.load(f).get("files", {})
+    except (OSError, ValueError):
+        previous = {}
+
+    files = {}
+    todo = []
+    for path in paths:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        entry = previous.get(path)
+        if (entry and entry["sha256"] == digest and os.path.exists(path + ".gz")
+                and (brotli is None or os.path.exists(path + ".br"))):
+            files[path] = entry
+        else:
+            todo.append(path)
+
+    if parallel and len(todo) > 1 and "fork" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=min(len(todo), os.cpu_count() or 1), mp_context=ctx) as pool:
+            files.update(pool.map(precompress_file, todo))
+    else:
+        files.update(map(precompress_file, todo))
+
+    for path in previous:
+        if path not in files:
+            for ext in (".gz", ".br"):
+                if os.path.exists(path + ext):
+                    os.remove(path + ext)
+
+    files = {path: files[path] for path in paths}
+    manifest = {
+        "files": files,
+        "bytes": sum(e["bytes"] for e in files.values()),
+        "gz_bytes": sum(e["gz_bytes"] for e in files.values()),
+        "br_bytes": sum(e["br_bytes"] for e in files.values()) if brotli is not None else None,
+    }
+    write_atomic(manifest_path, json.dumps(manifest, indent=2) + "\n")
+
+    if brotli is None:
+        print("⚠️  brotli not installed, only .gz copies written (pip install brotli)")
+    sizes = f"{manifest['bytes'] // 1024} KB → .gz {manifest['gz_bytes'] // 1024} KB"
+    if manifest["br_bytes"] is not None:
+        sizes += f", .br {manifest['br_bytes'] // 1024} KB"
+    print(f"✅ {len(todo)} artifacts compressed, {len(files) - len(todo)} unchanged ({sizes}); see {manifest_path}")
+    return manifest
+
+# Generated regions of index.html. update_index_html_in_place only rewrites what's between these.
+INDEX_DATA_BEGIN = "// genealogy-data:begin (generated by genealogy.py)"
+INDEX_DATA_END = "// genealogy-data:end"
+INDEX_BANNER_BEGIN = "<!-- gen-banner:begin (generated by genealogy.py) -->"
+INDEX_BANNER_END = "<!-- gen-banner:end -->"
+
+def splice_marked_regions(text, regions):
+    """
+    Replace what's between each (begin, end) marker pair of `text` in a single pass.
+
+    :param regions: {(begin_marker, end_marker): new text between them}; the markers are kept.
+    :return: the patched text.
+    """
+    spans = []
+    for (begin, end), content in regions.items():
+        start = text.find(begin)
+        if start < 0:
+            raise ValueError(f"Marker {begin!r} not found")
+        start += len(begin)
+        stop = text.find(end, start)
+        if stop < 0:
+            raise ValueError(f"Marker {end!r} not found after {begin!r}")
+        spans.append((start, stop, content))
+
+    parts = []
+    pos = 0
+    for start, stop, content in sorted(spans):
+        if start < pos:
+            raise ValueError("Marked regions overlap")
+        parts.append(text[pos:start])
+        parts.append(content)
+        pos = stop
+    parts.append(text[pos:])
+    return "".join(parts)
+
+def _marker_indent(text, marker):
+    """Whitespace in front of `marker` on its line."""
+    pos = text.find(marker)
+    return text[text.rfind("\n", 0, pos) + 1:pos]
+
+def _add_index_markers(html):
+    """
+    One-time migration for an index.html from before the markers: drop the old inline const
+    blocks and wrap the gen-banner, so every later build is a plain marker splice.
+    """
+    if INDEX_DATA_BEGIN not in html:
+        # remove prior genealogyData const blocks (single or multiple)
+        rm_pattern = r"""(?mx)
+            ^[ \t]*const[ \t]+genealogy(?:Data(?:_[A-Za-z0-9_]+|Url)?|SearchIndex)[ \t]*=[ \t]*
+            (?:[\[{][\s\S]*?[\]}]|"[^"\n]*")[ \t]*;[ \t]*$
+        """
+        html = re.sub(rm_pattern, "", html)
+
+        # markers go just after the first <script>, else before </body>
+        m = re.search(r"^([ \t]*)<script\b[^>]*>\n*", html, flags=re.MULTILINE)
+        if m:
+            inner_indent = m.group(1) + "\t"
+            markers = f"\n{inner_indent}{INDEX_DATA_BEGIN}\n{inner_indent}{INDEX_DATA_END}\n"
+            html = html[:m.start()] + html[m.start():m.end()].rstrip("\n") + markers + html[m.end():]
+        else:
+            markers = f"<script>\n\t{INDEX_DATA_BEGIN}\n\t{INDEX_DATA_END}\n</script>\n"
+            if re.search(r"</body>", html, flags=re.IGNORECASE):
+                html = re.sub(r"</body>", lambda _: markers + "</body>", html, count=1, flags=re.IGNORECASE)
+            else:
+                html += "\n" + markers
+        html = re.sub(r"\n{3,}", "\n\n", html)
+
+    if INDEX_BANNER_BEGIN not in html:
+        m = re.search(r'^([ \t]*)(<div id="gen-banner"[^>]*>[\s\S]*?<div class="gen-wrap">[\s\S]*?</div>[\s\S]*?</div>)',
+                      html, flags=re.MULTILINE)
+        if m:
+            indent = m.group(1)
+            html = (html[:m.start(2)] + f"{INDEX_BANNER_BEGIN}\n{indent}" + m.group(2)
+                    + f"\n{indent}{INDEX_BANNER_END}" + html[m.end(2):])
+    return html
+
+def update_index_html_in_place(roots, index_path="index.html", external_data=False):
     """
     Inject per-root arrays and a merged array into index.html:
       const genealogyData_<label> = [...];
@@ -395,15 +1320,25 @@ def update_index_html_in_place(roots, index_path="index.html"):
 
     Formatting:
       - One blank line between each const (including before the merged one)
-      - One tab ('\t') indent inside the <script> block
-      - Removes any prior genealogyData* const blocks before inserting
+      - Indented like the `// genealogy-data:begin` marker line inside the <script> block
+      - Only the text between the genealogy-data and gen-banner markers is replaced;
+        an index.html without markers gets them added on the first run (_add_index_markers)
+      - index.html is read once and written once, atomically (write_atomic)
+
+    Also writes `const genealogySearchIndex = {...};` (see build_search_index) so the
+    page's autocomplete and exact-record lookups don't rescan every record.
+
+    With external_data=True nothing is inlined: the records and search index go to a
+    content-hashed genealogy_data.<hash>.json next to index.html (see write_external_data)
+    and index.html only gets `const genealogyDataUrl = "genealogy_data.<hash>.json";`.
+    The page fetches it the first time the search box is used, so the HTML shell stays small
+    and the data file can be cached until it actually changes.
 
     NEW:
-      - Each person dict includes "gen_number", derived from the root's generation
-        (parsed from the root variable name, e.g., gopal_32 → 32; children increment by depth).
+      - Each person dict includes "gen_number", the person's resolved generation
+        (see resolve_generations: the root's gen_number or variable name, e.g. gopal_32 → 32,
+        +1 per level).
     """
-    import json, re, unicodedata
-
     # ---------- helpers ----------
     def slug_from_person(p):
         base = p.name or p.name_nep or "root"
@@ -411,55 +1346,7 @@ def update_index_html_in_place(roots, index_path="index.html"):
         norm = re.sub(r"[^a-z0-9]+", "_", norm.lower()).strip("_")
         return norm or "root"
 
-    def extract_root_gen(label, person):
-        """
-        Pick the root generation from the variable name.
-        Examples:
-          'gopal_32'      -> 32
-          'gopal_32_1'    -> 32   (first plausible 2+ digit number)
-          'bishwamvar_34' -> 34
-        Fallbacks: person.gen_number, else 32.
-        """
-        nums = [int(n) for n in re.findall(r'(\d+)', label)]
-        for n in nums:
-            if n >= 20:  # plausible generation window
-                return n
-        # fallback to object’s gen_number, then default
-        if getattr(person, "gen_number", None):
-            return int(person.gen_number)
-        return 32
-
-    def flatten_person(person, cur_gen):
-        """
-        Return a flat list of dicts for this subtree, tagging each with gen_number=cur_gen.
-        Also preserves father/grandfather (en/nep) like your existing payload.
-        """
-        entry = {
-            "name": person.name,
-            "name_nep": person.name_nep,
-            "birth_year": person.birth_year,
-            "gen_number": cur_gen,  # <-- NEW
-            "father": person.father.name if person.father else None,
-            "grandfather": person.father.father.name if person.father and person.father.father else None,
-            "ggfather": (
-                person.father.father.father.name
-                if person.father and person.father.father and person.father.father.father
-                else None
-            ),
-            "father_nep": person.father.name_nep if person.father else None,
-            "grandfather_nep": person.father.father.name_nep if person.father and person.father.father else None,
-            "ggfather_nep": (
-                person.father.father.father.name_nep
-                if person.father and person.father.father and person.father.father.father
-                else None
-            ),
-        }
-        people = [entry]
-        for child in person.children:
-            people.extend(flatten_person(child, cur_gen + 1))
-        return people
-
-    # ---------- normalize roots => list[(label, person, root_gen)] ----------
+    # ---------- normalize roots => list[(label, person)] ----------
     pairs = []
     for item in roots:
         if isinstance(item, tuple) and len(item) == 2:
@@ -467,11 +1354,7 @@ def update_index_html_in_place(roots, index_path="index.html"):
         else:
             person = item
             # try to recover the python variable name as label
-            label = None
-            for varname, obj in globals().items():
-                if obj is person:
-                    label = varname
-                    break
+            label = PERSON_INDEX.var_name(person)
             if not label:
                 label = slug_from_person(person)
 
@@ -480,20 +1363,22 @@ def update_index_html_in_place(roots, index_path="index.html"):
             label = "r_" + label
         # de-dup labels if repeated
         base, i = label, 2
-        while any(lbl == label for (lbl, _, __) in pairs):
+        while any(lbl == label for (lbl, _) in pairs):
             label = f"{base}_{i}"
             i += 1
 
-        root_gen = extract_root_gen(label, person)
-        pairs.append((label, person, root_gen))
+        pairs.append((label, person))
+    _ensure_generations([person for _, person in pairs])
 
     # ---------- build const strings (per root) + merged ----------
     per_root_consts = []
     merged_spreads = []
 
     all_gen_ranges = []
-    for label, person, root_gen in pairs:
-        plist = flatten_person(person, root_gen)
+    all_records = []
+    for label, person in pairs:
+        plist = list(flatten_person(person))
+        all_records.extend(plist)
         gen_numbers = [person.get('gen_number') for person in plist if isinstance(person.get('gen_number'), int) and 1 <= person.get('gen_number') <= 100]
         gen_range_tuple = (min(gen_numbers), max(gen_numbers))
         all_gen_ranges.append(gen_range_tuple)
@@ -503,38 +1388,20 @@ def update_index_html_in_place(roots, index_path="index.html"):
 
     # Calculate total generation number range
     total_gen_range = (min(r[0] for r in all_gen_ranges), max(r[1] for r in all_gen_ranges))
-    merged_const = f"const genealogyData = [{', '.join(merged_spreads)}];"
-
-    # ---------- read/patch index.html ----------
-    with open(index_path, "r", encoding="utf-8") as f:
-        html = f.read()
-
-    # remove prior genealogyData const blocks (single or multiple)
-    rm_pattern = r"""(?mx)
-        ^[ \t]*const[ \t]+genealogyData(?:_[A-Za-z0-9_]+)?[ \t]*=[ \t]*\[[\s\S]*?\][ \t]*;[ \t]*$
-    """
-    html = re.sub(rm_pattern, "", html)
-
-    # insert new consts just after the first <script>, else before </body>
-    m = re.search(r"^([ \t]*)<script\b[^>]*>", html, flags=re.MULTILINE)
-    if m:
-        script_indent = m.group(1)
-        inner_indent = script_indent + "\t"
-        block = "\n\n".join(inner_indent + s for s in per_root_consts + [merged_const]) + "\n"
-        html = html[:m.end()] + "\n" + block + html[m.end():]
+    search_index = build_search_index(all_records)
+    if external_data:
+        data_name = write_external_data(
+            {"genealogyData": all_records, "genealogySearchIndex": search_index},
+            out_dir=os.path.dirname(index_path) or ".")
+        consts = [f"const genealogyDataUrl = {json.dumps(data_name)};"]
     else:
-        inner_indent = "\t"
-        block = "\n\n".join(inner_indent + s for s in per_root_consts + [merged_const]) + "\n"
-        html = re.sub(r"</body>", block + "</body>", html, count=1, flags=re.IGNORECASE) or (html + "\n" + block)
+        merged_const = f"const genealogyData = [{', '.join(merged_spreads)}];"
+        search_index_json = json.dumps(search_index, ensure_ascii=False, separators=(",", ":"))
+        search_const = f"const genealogySearchIndex = {search_index_json};"
+        consts = per_root_consts + [merged_const, search_const]
 
-    # tidy and write
-    html = re.sub(r"\n{3,}", "\n\n", html)
-    with open(index_path, "w", encoding="utf-8") as f:
-        f.write(html)
-
-    print("✅ index.html updated with genealogyData blocks.")
-
-    # ---------- Replace gen-banner with encircled numbers ----------
+    # ---------- gen-banner with encircled numbers ----------
+    banner_html = None
     if total_gen_range:
         start, end = total_gen_range
 
@@ -556,24 +1423,121 @@ def update_index_html_in_place(roots, index_path="index.html"):
             '</div>'
         )
 
-        with open(index_path, "r", encoding="utf-8") as f:
-            html_content = f.read()
-
-        # REPALCE  the whole <div id="gen-banner">...</div> block (single-pass)
-        new_html = re.sub(
-            r'<div id="gen-banner"[^>]*>[\s\S]*?<div class="gen-wrap">[\s\S]*?</div>[\s\S]*?</div>',
-            banner_html,
-            html_content,
-            flags=re.DOTALL
-        )
+    # ---------- patch index.html: one read, one splice of the marked regions, one atomic write ----------
+    with open(index_path, "r", encoding="utf-8") as f:
+        html = f.read()
+    html = _add_index_markers(html)
+    previous_data = re.search(r'const genealogyDataUrl = "([^"]+)";', html)
 
-        with open(index_path, "w", encoding="utf-8") as f:
-            f.write(new_html)
+    data_indent = _marker_indent(html, INDEX_DATA_BEGIN)
+    regions = {(INDEX_DATA_BEGIN, INDEX_DATA_END):
+               "\n" + "\n\n".join(data_indent + s for s in consts) + "\n" + data_indent}
+    if banner_html:
+        banner_indent = _marker_indent(html, INDEX_BANNER_BEGIN)
+        regions[(INDEX_BANNER_BEGIN, INDEX_BANNER_END)] = "\n" + banner_indent + banner_html + "\n" + banner_indent
+    write_atomic(index_path, splice_marked_regions(html, regions))
 
+    print("✅ index.html updated with genealogyData blocks.")
+    if external_data:
+        # only now that the new index.html is in place; the data file it replaced stays for cached pages
+        keep = {data_name} | ({previous_data.group(1)} if previous_data else set())
+        removed = prune_external_data(keep, out_dir=os.path.dirname(index_path) or ".")
+        if removed:
+            print(f"✅ removed {len(removed)} old genealogy_data files (kept {', '.join(sorted(keep))}).")
+    if banner_html:
         print(f"✅ gen-banner updated in {index_path} with encircled generations {start}–{end}")
 
-# --- Timeline HTML updater (robust & verified) ---
+# --- Timeline HTML updater ---
+# panel id in timeline.html -> TIMELINE_DATA key whose rows go into that panel's timeline-grid
+TIMELINE_PANELS = {"panel-ne": "timeline_nep", "panel-en": "timeline_eng"}
+TIMELINE_GRID_OPEN = '<div class="timeline-grid">'
+
+def _timeline_markers(panel_id):
+    return (f"<!-- {panel_id} timeline-grid:begin (generated by genealogy.py) -->",
+            f"<!-- {panel_id} timeline-grid:end -->")
+
+def render_timeline_rows(timeline_items):
+    """
+    HTML of the tl-row divs for one panel, exactly as update_timeline_html_bs4 serializes them.
+
+    Items are (time_label, title) or (time_label, title, description); the strings are inserted
+    as-is, so they may contain markup, same as before.
+    """
+    rows = []
+    for item in timeline_items:
+        # Handle different data formats
+        if len(item) == 3:
+            time_label, title, description = item
+            desc_html = f'<p class="tl-desc">{description}</p>\n'
+        elif len(item) == 2:
+            time_label, title = item
+            desc_html = ""
+        else:
+            print(f"Invalid item format: {item}")
+            continue
+        rows.append(
+            f'<div aria-label="{time_label}" class="tl-row">\n'
+            f'<span class="tl-time">{time_label}</span>\n'
+            '<div>\n'
+            '<span aria-hidden="true" class="tl-dot"></span>\n'
+            f'<div class="tl-meta">{time_label}</div>\n'
+            f'<div class="tl-title">{title}</div>\n'
+            f'{desc_html}'
+            '</div>\n'
+            '</div>'
+        )
+    return "".join(rows)
+
+def _add_timeline_markers(html_content):
+    """
+    One-time migration for a timeline.html from before the markers: wrap the timeline-grid div
+    of every panel in begin/end comments, finding its closing tag by counting <div> nesting.
+    """
+    for panel_id in TIMELINE_PANELS:
+        begin, end = _timeline_markers(panel_id)
+        if begin in html_content:
+            continue
+        panel = re.search(rf'<[^>]*\bid="{re.escape(panel_id)}"', html_content)
+        grid_start = html_content.find(TIMELINE_GRID_OPEN, panel.end()) if panel else -1
+        if grid_start < 0:
+            print(f"Panel with id '{panel_id}' not found")
+            continue
+        depth = 0
+        for tag in re.finditer(r"<(/?)div\b[^>]*>", html_content[grid_start:]):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                grid_end = grid_start + tag.end()
+                break
+        else:
+            raise ValueError(f"Unclosed timeline-grid in {panel_id}")
+        html_content = (html_content[:grid_start] + begin + html_content[grid_start:grid_end]
+                        + end + html_content[grid_end:])
+    return html_content
+
 def update_timeline_html(html_content, timeline_data):
+    """
+    Updates timeline.html by replacing each panel's timeline-grid with rows rendered from timeline_data.
+
+    The grids sit between `<!-- panel-xx timeline-grid:begin/end -->` comments (added on the
+    first run if missing), so this is one string splice, no HTML parsing.
+
+    Args:
+        html_content (str): The HTML content of timeline.html
+        timeline_data (dict): Dictionary containing 'timeline_nep' and 'timeline_eng' data
+
+    Returns:
+        str: Updated HTML content
+    """
+    html_content = _add_timeline_markers(html_content)
+    regions = {}
+    for panel_id, data_key in TIMELINE_PANELS.items():
+        markers = _timeline_markers(panel_id)
+        if markers[0] in html_content:
+            rows = render_timeline_rows(timeline_data.get(data_key, []))
+            regions[markers] = f"{TIMELINE_GRID_OPEN}{rows}</div>"
+    return splice_marked_regions(html_content, regions)
+
+def update_timeline_html_bs4(html_content, timeline_data):
     """
     Updates timeline.html by clearing existing timeline-grid content and inserting new timeline rows.
 
@@ -583,7 +1547,12 @@ def update_timeline_html(html_content, timeline_data):
 
     Returns:
         str: Updated HTML content
+
+    This is the original BeautifulSoup implementation, now only used to validate the
+    marker splice in update_timeline_html (bs4 is imported here, not at startup).
     """
+    from bs4 import BeautifulSoup
+
     # Parse HTML content
     soup = BeautifulSoup(html_content, 'html.parser')
 
@@ -650,23 +1619,264 @@ def update_timeline_html(html_content, timeline_data):
     # Return updated HTML
     return str(soup)
 
+def update_timeline_file(timeline_path="timeline.html", timeline_data=None, validate=False):
+    """
+    Rewrite timeline.html in place from TIMELINE_DATA.
+
+    :param validate: also run update_timeline_html_bs4 (needs bs4) and fail if the marker splice
+                     doesn't produce the same document.
+    """
+    if timeline_data is None:
+        timeline_data = TIMELINE_DATA
+    with open(timeline_path, 'r', encoding='utf-8') as file:
+        html_content = file.read()
+    updated_html = update_timeline_html(html_content, timeline_data)
+    if validate:
+        from bs4 import BeautifulSoup
+        expected = update_timeline_html_bs4(_add_timeline_markers(html_content), timeline_data)
+        if str(BeautifulSoup(updated_html, 'html.parser')) != expected:
+            raise ValueError(f"{timeline_path}: marker splice differs from the BeautifulSoup rewrite")
+        print(f"✅ {timeline_path} validated against BeautifulSoup.")
+    write_atomic(timeline_path, updated_html)
+    print(f"✅ {timeline_path} updated with TIMELINE_DATA.")
+
+# --- Build orchestration ---
+# Roots of the build in progress; forked stage workers inherit the loaded Person graph through this.
+_BUILD_ROOTS = []
+_BUILD_OPTIONS = {}
+
+def _stage_outputs(stage):
+    kind, _, arg = stage.partition(":")
+    if kind == "tree":
+        outputs = (f"sisneri_poudel_tree_{arg}.html", f"sisneri_poudel_tree_{arg}.txt")
+        if _BUILD_OPTIONS.get("shard_generation") is not None:
+            outputs += (tree_shard_dir(outputs[0]),)
+        return outputs
+    return {"json": (genealogy_json_file,), "index": ("index.html",), "timeline": ("timeline.html",),
+            "compress": (COMPRESSION_MANIFEST,)}[kind]
+
+def _artifact_paths(stages):
+    """Every file the given stages wrote (directories such as tree shards expanded), for compression and profiling."""
+    paths = []
+    for stage in stages:
+        for output in _stage_outputs(stage):
+            if os.path.isdir(output):
+                paths.extend(sorted(glob.glob(os.path.join(output, "*.html"))))
+            elif os.path.exists(output):
+                paths.append(output)
+    return paths
+
+def _stage_digest(stage):
+    """Digest of everything a stage's output depends on, for incremental builds."""
+    hashes = _BUILD_OPTIONS["hashes"]
+    if stage == "timeline":
+        return genealogy_cache.forest_digest([], hashes, _BUILD_OPTIONS["code"], repr(TIMELINE_DATA))
+    if stage == "json":
+        return genealogy_cache.forest_digest(_BUILD_ROOTS, hashes, _BUILD_OPTIONS["code"], stage,
+                                             _BUILD_OPTIONS.get("compact_json", False))
+    # the root generations can come from variable names, which the subtree hashes don't cover
+    root_gens = [root.generation for root in _BUILD_ROOTS]
+    if stage == "index":
+        return genealogy_cache.forest_digest(_BUILD_ROOTS, hashes, _BUILD_OPTIONS["code"], stage, root_gens,
+                                             _BUILD_OPTIONS.get("external_data", False))
+    return genealogy_cache.forest_digest(_BUILD_ROOTS, hashes, _BUILD_OPTIONS["code"], stage, root_gens,
+                                         _BUILD_OPTIONS.get("shard_generation"), _BUILD_OPTIONS.get("virtual_tree"),
+                                         _BUILD_OPTIONS.get("merge_spans", False),
+                                         _BUILD_OPTIONS.get("css_classes", False))
+
+def _run_stage(stage):
+    """
+    Run one named build stage against _BUILD_ROOTS.
 
-if __name__ == "__main__":
-    # roots is all the root Person of the unconnected family tree
-    roots = [gopal_32, bishwamvar_34]
-    for language in ("en", "np"):
+    Returns (stage, wall seconds, stats), where stats is the genealogy_profile record of the
+    stage when profiling is on, else None.
+    """
+    if not genealogy_profile.enabled():
+        start = time.perf_counter()
+        _build_stage(stage)
+        return stage, time.perf_counter() - start, None
+    # directory outputs (tree shards) are expanded to their files once the stage has written them
+    with genealogy_profile.stage(stage, lambda: _artifact_paths([stage])) as stats:
+        stats["skipped"] = not _build_stage(stage)
+    return stage, stats["wall_s"], stats
+
+def _build_stage(stage):
+    """Build one stage's outputs; False if an incremental build found them up to date."""
+    # compress checks each artifact's content hash itself
+    incremental = _BUILD_OPTIONS.get("incremental", False) and stage != "compress"
+    if incremental:
+        digest = _stage_digest(stage)
+        if genealogy_cache.stage_is_fresh(stage.replace(":", "_"), digest, _stage_outputs(stage)):
+            print(f"✅ {stage} unchanged, skipped.")
+            return False
+
+    kind, _, arg = stage.partition(":")
+    if kind == "json":
+        export_json(_BUILD_ROOTS, genealogy_json_file, compact=_BUILD_OPTIONS.get("compact_json", False))
+    elif kind == "tree" and _BUILD_OPTIONS.get("virtual_tree"):
+        export_tree_rows(_BUILD_ROOTS, print_language=arg, out_html_path=f"sisneri_poudel_tree_{arg}.html",
+                         out_txt_path=f"sisneri_poudel_tree_{arg}.txt")
+    elif kind == "tree":
+        cache = None
+        if incremental:
+            cache = genealogy_cache.TreeRenderCache(
+                os.path.join(genealogy_cache.CACHE_DIR, f"tree_{arg}.marshal"),
+                _BUILD_OPTIONS["hashes"], code=_BUILD_OPTIONS["code"])
         export_roots_trees(
-            roots,   # order matters
-            print_language=language,
-            out_html_path=f"sisneri_poudel_tree_{language}.html",
-            out_txt_path=f"sisneri_poudel_tree_{language}.txt"
+            _BUILD_ROOTS,   # order matters
+            print_language=arg,
+            out_html_path=f"sisneri_poudel_tree_{arg}.html",
+            out_txt_path=f"sisneri_poudel_tree_{arg}.txt",
+            stream=_BUILD_OPTIONS.get("stream", False),
+            cache=cache,
+            shard_generation=_BUILD_OPTIONS.get("shard_generation"),
+            merge_spans=_BUILD_OPTIONS.get("merge_spans", False),
+            css_classes=_BUILD_OPTIONS.get("css_classes", False)
         )
-    update_index_html_in_place(roots, index_path="index.html")
+        if cache is not None:
+            cache.save()
+            print(f"✅ {stage}: {cache.hits} subtrees spliced from cache, {cache.misses} re-rendered.")
+    elif kind == "index":
+        update_index_html_in_place(_BUILD_ROOTS, index_path="index.html",
+                                   external_data=_BUILD_OPTIONS.get("external_data", False))
+    elif kind == "timeline":
+        update_timeline_file("timeline.html", validate=_BUILD_OPTIONS.get("validate_timeline", False))
+    elif kind == "compress":
+        compress_artifacts(_artifact_paths(_BUILD_OPTIONS["stages"]), parallel=_BUILD_OPTIONS.get("parallel", False))
+    else:
+        raise ValueError(f"Unknown build stage {stage!r}")
 
-    #Updating Timeline
-    with open('timeline.html', 'r', encoding='utf-8') as file:
-        html_content = file.read()
-    updated_html = update_timeline_html(html_content, TIMELINE_DATA)
-    with open('timeline.html', 'w', encoding='utf-8') as file:
-        file.write(updated_html)
-        print("✅ timeline.html updated with TIMELINE_DATA.")
+    if incremental:
+        genealogy_cache.mark_stage(stage.replace(":", "_"), digest)
+    return True
+
+def build_site(roots, parallel=False, stream=False, incremental=False, compact_json=False,
+               external_data=False, validate_timeline=False, shard_generation=None, virtual_tree=False,
+               merge_spans=False, css_classes=False, compress=False):
+    """
+    Regenerate every site artifact from the loaded Person graph.
+
+    The stages (genealogy_tree.json, en tree, np tree, index.html data, timeline.html) are independent once
+    the data is loaded. With parallel=True they fan out over a process pool whose
+    workers are forked, so they share the already-loaded tree instead of re-importing it.
+    Where fork isn't available (Windows/macOS spawn) the stages run serially.
+
+    With incremental=True every subtree is content-hashed and the results are cached in
+    .genealogy_cache/: stages whose inputs didn't change are skipped, and the tree pages
+    only re-render the subtrees on the path to an edit, splicing the rest from cache.
+
+    With external_data=True index.html loads its search data from genealogy_data.<hash>.json
+    instead of inlining it (see update_index_html_in_place). validate_timeline=True checks the
+    timeline.html splice against the BeautifulSoup rewrite (needs bs4). shard_generation=N
+    writes the tree pages as lazily loaded skeletons + per-branch shards (see export_roots_trees),
+    virtual_tree=True as row tables drawn by a virtualized viewer (see export_tree_rows).
+    merge_spans=True draws the tree connectors with merged class spans, css_classes=True also styles
+    names and note marks through classes (see iter_tree_lines).
+
+    compress=True adds a last stage that writes .gz (and .br) copies of every generated file and
+    compression_manifest.json, recompressing only files whose content changed (see compress_artifacts).
+
+    Prints and returns the wall time of each stage, plus the total. With profiling on
+    (--profile / --profile-dir, or the GENEALOGY_PROFILE / GENEALOGY_PROFILE_DIR env vars) each
+    stage also records CPU time, peak RSS, bytes written and optionally a cProfile dump, and the
+    JSON report lists them after the data load (see genealogy_profile).
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    _BUILD_ROOTS[:] = roots
+    # Resolve every person's generation once, before the stages (and their forked workers) read it
+    for warning in resolve_generations(roots):
+        print(f"⚠️  {warning}")
+    _BUILD_OPTIONS["stream"] = stream
+    _BUILD_OPTIONS["incremental"] = incremental
+    _BUILD_OPTIONS["compact_json"] = compact_json
+    _BUILD_OPTIONS["external_data"] = external_data
+    _BUILD_OPTIONS["validate_timeline"] = validate_timeline
+    if shard_generation is not None and virtual_tree:
+        raise ValueError("shard_generation and virtual_tree are two different tree page layouts; pick one")
+    _BUILD_OPTIONS["shard_generation"] = shard_generation
+    _BUILD_OPTIONS["virtual_tree"] = virtual_tree
+    _BUILD_OPTIONS["merge_spans"] = merge_spans
+    _BUILD_OPTIONS["css_classes"] = css_classes
+    if incremental:
+        _BUILD_OPTIONS["hashes"] = genealogy_cache.subtree_hashes(roots)
+        _BUILD_OPTIONS["code"] = genealogy_cache.code_digest()
+    stages = ["json", "tree:en", "tree:np", "index", "timeline"]
+    _BUILD_OPTIONS["stages"] = stages
+    _BUILD_OPTIONS["parallel"] = parallel
+
+    start = time.perf_counter()
+    if parallel and "fork" in multiprocessing.get_all_start_methods():
+        # Keep the loaded graph out of GC bookkeeping so forked workers don't copy its pages
+        gc.freeze()
+        ctx = multiprocessing.get_context("fork")
+        workers = min(len(stages), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            results = list(pool.map(_run_stage, stages))
+    else:
+        results = [_run_stage(stage) for stage in stages]
+    if compress:
+        # needs every other stage's output, so it runs once they are all done
+        results.append(_run_stage("compress"))
+    timings = {stage: seconds for stage, seconds, _ in results}
+    timings["total"] = time.perf_counter() - start
+
+    for stage, seconds in timings.items():
+        print(f"⏱  {stage:<10} {seconds * 1000:8.1f} ms")
+
+    if genealogy_profile.enabled():
+        report = genealogy_profile.write_report(
+            [_DATA_LOAD_STATS] + [stats for _, _, stats in results],
+            total_wall_s=round(timings["total"], 6), parallel=parallel, incremental=incremental,
+            stream=stream, roots=[root.name for root in roots])
+        if report:
+            print(f"✅ profile report written to {report}")
+        if genealogy_profile.SETTINGS["profile_dir"]:
+            print(f"✅ cProfile dumps in {genealogy_profile.SETTINGS['profile_dir']}/ "
+                  f"(python -m pstats {genealogy_profile.SETTINGS['profile_dir']}/tree_en.prof)")
+    return timings
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Regenerate the Sisneri Poudel genealogy site.")
+    parser.add_argument("--parallel", action="store_true",
+                        help="render the en/np trees, index.html and timeline.html concurrently")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream tree HTML/TXT to disk instead of building them in memory")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip unchanged outputs and re-render only edited subtrees (cache in .genealogy_cache/)")
+    parser.add_argument("--compact-json", action="store_true",
+                        help="write genealogy_tree.json without indentation or \\u escapes")
+    parser.add_argument("--external-data", action="store_true",
+                        help="move index.html's search data to a cacheable genealogy_data.<hash>.json (+ .gz/.br)")
+    parser.add_argument("--profile", metavar="REPORT.json",
+                        help="write per-stage wall/CPU time, peak RSS and bytes written to this JSON file")
+    parser.add_argument("--profile-dir", metavar="DIR",
+                        help="also dump a cProfile .prof file per stage into DIR")
+    parser.add_argument("--validate-timeline", action="store_true",
+                        help="check the timeline.html splice against a BeautifulSoup rewrite (needs bs4)")
+    parser.add_argument("--shard-generation", type=int, metavar="N",
+                        help="split the tree pages at generation N (e.g. 34) into branches loaded on demand")
+    parser.add_argument("--virtual-tree", action="store_true",
+                        help="write the tree pages as row data drawn by a viewer that only renders visible rows")
+    parser.add_argument("--merge-spans", action="store_true",
+                        help="draw tree connectors as one class-styled span per same-color run (smaller, same look)")
+    parser.add_argument("--css-classes", action="store_true",
+                        help="style the tree pages from one class stylesheet instead of inline styles (implies --merge-spans)")
+    parser.add_argument("--compress", action="store_true",
+                        help="also write max-level .gz/.br copies of every output (only for changed files) "
+                             "and compression_manifest.json")
+    args = parser.parse_args()
+    if args.shard_generation is not None and args.virtual_tree:
+        parser.error("--shard-generation and --virtual-tree can't be combined")
+    genealogy_profile.configure(report=args.profile, profile_dir=args.profile_dir)
+
+    # roots is all the root Person of the unconnected family tree
+    roots = [gopal_32, bishwamvar_34]
+    build_site(roots, parallel=args.parallel, stream=args.stream, incremental=args.incremental,
+               compact_json=args.compact_json, external_data=args.external_data,
+               validate_timeline=args.validate_timeline, shard_generation=args.shard_generation,
+               virtual_tree=args.virtual_tree, merge_spans=args.merge_spans, css_classes=args.css_classes,
+               compress=args.compress)
@@ -0,0 +1,160 @@
+"""On-disk cache for incremental rebuilds: per-subtree content hashes and spliceable rendered lines"""
+import bisect, hashlib, json, marshal, os
+
+from genealogy_io import write_atomic
+
+CACHE_DIR = ".genealogy_cache"
+
+# Sources whose changes invalidate every cached render; next to this module, whatever the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+CODE_FILES = tuple(os.path.join(HERE, name) for name in
+                   ("genealogy.py", "genealogy_class.py", "genealogy_constants.py", "genealogy_cache.py"))
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def code_digest(paths=CODE_FILES):
+    """
+    Hash of the rendering code, so a change to genealogy.py throws the old renders away.
+    Raises FileNotFoundError if a listed file is missing, rather than hashing less code.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def subtree_hashes(roots):
+    """
+    Content hash of every subtree, keyed by id(person).
+
+    Covers everything print_tree shows or Person.to_dict writes for a person (name, name_nep,
+    gender, place, birth_year, death_year, comment, edit, gen_number, grandfather_nep and the
+    father / grandfather link names) plus the hashes of all children in order, so the tree pages
+    and genealogy_tree.json can both be skipped on it. Computed bottom-up with an explicit stack, one pass over the forest.
+    """
+    hashes = {}
+    in_progress = set()
+    stack = [(root, False) for root in reversed(roots)]
+    while stack:
+        person, children_done = stack.pop()
+        if id(person) in hashes:
+            continue  # attached under two parents, already hashed
+        if not children_done:
+            if id(person) in in_progress:
+                raise ValueError(f"Cycle in the family tree at {person.name}")
+            in_progress.add(id(person))
+            stack.append((person, True))
+            stack.extend((child, False) for child in reversed(person.children))
+            continue
+
+        father = person.father
+        grandfather = person.grandfather
+        fields = (person.name, person.name_nep, person.gender, person.place, person.birth_year,
+                  person.death_year, person.comment, person.edit, person.gen_number, person.grandfather_nep,
+                  father.name if father else None, grandfather.name if grandfather else None)
+        h = hashlib.blake2b(repr(fields).encode("utf-8"), digest_size=16)
+        for child in person.children:
+            h.update(hashes[id(child)].encode("ascii"))
+        hashes[id(person)] = h.hexdigest()
+        in_progress.discard(id(person))
+    return hashes
+
+
+def forest_digest(roots, hashes, *extra):
+    """Single digest for a whole build input: the root subtree hashes plus any extra values."""
+    return _digest(repr([hashes[id(root)] for root in roots] + list(extra)))
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # json.dumps uses the C encoder; json.dump(f) would go through the pure-Python one
+    write_atomic(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+
+def stage_is_fresh(stage, digest, outputs=()):
+    """True when `stage` last ran on the same input digest and all its outputs still exist."""
+    state = _read_json(os.path.join(CACHE_DIR, f"stage_{stage}.json"))
+    return bool(state) and state.get("digest") == digest and all(os.path.exists(p) for p in outputs)
+
+
+def mark_stage(stage, digest):
+    _write_json(os.path.join(CACHE_DIR, f"stage_{stage}.json"), {"digest": digest})
+
+
+class TreeRenderCache:
+    """
+    Rendered (text, html) lines of one tree page from the previous build, plus the line range
+    every subtree occupied.
+
+    iter_tree_lines asks for each node's key (subtree hash + everything about where it is drawn:
+    prefix, colors, generation...). On a hit the whole subtree's lines are spliced from the old
+    page and the walk skips its children; on a miss the node is rendered and its range recorded.
+    """
+    def __init__(self, path, hashes, code=None):
+        self.path = path
+        self.hashes = hashes
+        self.code = code if code is not None else code_digest()
+        self.lines = []
+        self.ranges = []
+        self.hits = self.misses = 0
+
+        try:
+            with open(path, "rb") as f:
+                old = marshal.loads(f.read())  # much faster than marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            old = None
+        if not isinstance(old, dict) or old.get("code") != self.code:
+            old = {"lines": [], "ranges": []}
+        self.old_lines = old["lines"]
+        self.old_ranges = old["ranges"]  # [start, end, key], sorted by start
+        self.old_starts = [r[0] for r in self.old_ranges]
+        self.old_by_key = {key: (start, end) for start, end, key in self.old_ranges}
+
+    def key(self, person, context):
+        return _digest(self.hashes[id(person)] + repr(context))
+
+    def splice(self, key):
+        """Lines of the subtree rendered under `key` in the previous build, or None."""
+        span = self.old_by_key.get(key)
+        if span is None:
+            self.misses += 1
+            return None
+        start, end = span
+        # carry the nested ranges along, so a later edit inside this subtree can still splice
+        offset = len(self.lines) - start
+        i = bisect.bisect_left(self.old_starts, start)
+        while i < len(self.old_ranges) and self.old_ranges[i][0] < end:
+            old_start, old_end, old_key = self.old_ranges[i]
+            self.ranges.append((old_start + offset, old_end + offset, old_key))
+            i += 1
+        lines = self.old_lines[start:end]
+        self.lines.extend(lines)
+        self.hits += 1
+        return lines
+
+    def begin(self):
+        """Start a freshly rendered subtree; returns its first line index for end()."""
+        return len(self.lines)
+
+    def add(self, text_line, html_line):
+        self.lines.append((text_line, html_line))
+
+    def end(self, key, start):
+        self.ranges.append((start, len(self.lines), key))
+
+    def save(self):
+        # marshal: several times faster than JSON for a few MB of line tuples, and it's private to the build
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        write_atomic(self.path, marshal.dumps({"code": self.code, "lines": self.lines, "ranges": sorted(self.ranges)}))
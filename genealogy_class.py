@@ -1,4 +1,5 @@
 import json
+import sys
 
 class Person:
     def __init__(self, name, gender="Male", name_nep=None, birth_year=None, death_year=None, gen_number=None, children=None, place=None, comment=None, edit=False):
@@ -16,6 +17,7 @@ class Person:
         self.grandfather = None  # Person object
         self.grandfather_nep = "" #actual nepali name
         self.edit = edit
+        self.generation = None  # resolved generation, filled in by genealogy.resolve_generations
 
     def add_child(self, child):
         self.children.append(child)
@@ -48,3 +50,52 @@ class Person:
                 for child in self.children
             ]
         }
+
+
+class CompactPerson:
+    """
+    Slotted drop-in for Person, for when several Poudel branches are loaded at once.
+
+    Same public attributes and add_child / to_dict behaviour as Person, but no per-instance
+    __dict__, father_nep / grandfather_nep are read off the parent links instead of being
+    copied at add_child time, and the low-cardinality strings (gender, place) are interned.
+    """
+    __slots__ = ("name", "name_nep", "gender", "birth_year", "death_year", "place", "comment",
+                 "gen_number", "children", "father", "grandfather", "edit", "generation")
+
+    def __init__(self, name, gender="Male", name_nep=None, birth_year=None, death_year=None, gen_number=None, children=None, place=None, comment=None, edit=False):
+        self.name = name
+        self.name_nep = name_nep
+        self.gender = _intern(gender)
+        self.birth_year = birth_year
+        self.death_year = death_year
+        self.place = _intern(place)
+        self.comment = comment
+        self.gen_number = gen_number
+        self.children = children or []
+        self.father = None  # Person object
+        self.grandfather = None  # Person object
+        self.edit = edit
+        self.generation = None  # resolved generation, filled in by genealogy.resolve_generations
+
+    @property
+    def father_nep(self):
+        return self.father.name_nep if self.father else ""
+
+    @property
+    def grandfather_nep(self):
+        return self.grandfather.name_nep if self.grandfather else ""
+
+    def add_child(self, child):
+        self.children.append(child)
+        child.father = self
+        if self.father:
+            child.grandfather = self.father
+
+    # Bulk linking and export work exactly like Person
+    add_children = Person.add_children
+    to_dict = Person.to_dict
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
@@ -0,0 +1,26 @@
+"""Crash-safe file writes shared by the build modules"""
+import os
+
+
+def write_atomic(path, data):
+    """
+    Write `data` (str as UTF-8, or bytes) to a temp file next to `path`, then os.replace() it over
+    `path`, so a crash mid-write never leaves a truncated file behind. An existing file keeps its mode.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if isinstance(data, str):
+            f = open(tmp_path, "w", encoding="utf-8")
+        else:
+            f = open(tmp_path, "wb")
+        with f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
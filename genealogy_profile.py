@@ -0,0 +1,90 @@
+"""Opt-in per-stage build instrumentation: wall / CPU time, peak RSS, bytes written, cProfile dumps"""
+import cProfile, json, os, sys, time
+from contextlib import contextmanager
+
+from genealogy_io import write_atomic
+
+try:
+    import resource  # not on Windows; peak RSS is reported as None there
+except ImportError:
+    resource = None
+
+# Both can also be set from the command line (genealogy.py --profile / --profile-dir).
+# The env vars matter for the data load, which happens at import time, before argparse runs.
+PROFILE_ENV = "GENEALOGY_PROFILE"          # path of the JSON report
+PROFILE_DIR_ENV = "GENEALOGY_PROFILE_DIR"  # directory for <stage>.prof cProfile dumps
+
+SETTINGS = {"report": os.environ.get(PROFILE_ENV) or None,
+            "profile_dir": os.environ.get(PROFILE_DIR_ENV) or None}
+
+
+def configure(report=None, profile_dir=None):
+    """Turn on the JSON report and / or cProfile dumps (None leaves a setting as it is)."""
+    if report:
+        SETTINGS["report"] = report
+    if profile_dir:
+        SETTINGS["profile_dir"] = profile_dir
+
+
+def enabled():
+    return bool(SETTINGS["report"] or SETTINGS["profile_dir"])
+
+
+def peak_rss_kb():
+    """High-water resident set size of this process so far, in KB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS reports bytes, Linux KB
+
+
+@contextmanager
+def stage(name, outputs=()):
+    """
+    Measure the block as build stage `name`; yields the stats dict, filled in on exit:
+      stage, wall_s, cpu_s, peak_rss_kb, bytes_written (total size of `outputs` afterwards, 0 if
+      the block set stats["skipped"])
+    and, when a profile dir is configured, profile (path of the stage's cProfile dump).
+
+    `outputs` is a list of file paths, or a callable returning one, called when the block ends
+    (for outputs whose files are only known once the stage ran, like a directory of tree shards).
+
+    peak_rss_kb is the process high-water mark when the stage ended, so in a serial build
+    it only grows; a stage that raised it is the one that needed the memory.
+    """
+    stats = {"stage": name}
+    profiler = None
+    if SETTINGS["profile_dir"]:
+        profiler = cProfile.Profile()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield stats
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        stats["wall_s"] = round(time.perf_counter() - wall, 6)
+        stats["cpu_s"] = round(time.process_time() - cpu, 6)
+        stats["peak_rss_kb"] = peak_rss_kb()
+        if stats.get("skipped"):
+            stats["bytes_written"] = 0
+        else:
+            paths = outputs() if callable(outputs) else outputs
+            stats["bytes_written"] = sum(os.path.getsize(p) for p in paths if os.path.isfile(p))
+        if profiler is not None:
+            os.makedirs(SETTINGS["profile_dir"], exist_ok=True)
+            path = os.path.join(SETTINGS["profile_dir"], name.replace(":", "_") + ".prof")
+            profiler.dump_stats(path)
+            stats["profile"] = path
+
+
+def write_report(stages, **extra):
+    """Write the configured JSON report: {"stages": [...], **extra}. Returns its path, or None."""
+    path = SETTINGS["report"]
+    if not path:
+        return None
+    report = dict(extra, stages=list(stages))
+    write_atomic(path, json.dumps(report, ensure_ascii=False, indent=2))
+    return path
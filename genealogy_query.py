@@ -0,0 +1,396 @@
+"""Ancestor / descendant / relationship queries over the Person forest (Euler-tour intervals, binary lifting)"""
+import bisect, sys
+from array import array
+
+from genealogy_store import GENDER_CODES, GENDERS
+
+
+class FamilyQuery:
+    """
+    Entry/exit numbering of every Person, from one DFS over all roots.
+
+    Each place a person appears in the trees is a row, numbered in pre-order (the order print_tree
+    renders in). Row r's subtree is rows tin[r] .. tout[r]-1, so:
+      - "is X a descendant of Y" is an interval check, O(1)
+      - Y's descendants are one contiguous slice of `people`
+      - subtree counts (total, per gender, per generation) come from prefix sums / bisect
+
+    Someone attached under two parents appears in two rows, each with a copy of the same subtree,
+    like on the tree pages. Queries use a person's first row (their subtree is the same in both)
+    and count each person once.
+
+        query = FamilyQuery([gopal_32, bishwamvar_34])
+        query.is_descendant(lekhnath, prajapati_34)
+        query.descendants(prajapati_34)
+    """
+    def __init__(self, roots, root_gens=None):
+        """
+        :param roots: list of root Person objects (e.g. [gopal_32, bishwamvar_34]).
+        :param root_gens: optional generation number per root; defaults to the root's resolved
+                          generation (genealogy.resolve_generations), else root.gen_number (or 0).
+        """
+        self.people = []  # row -> Person, in pre-order
+        self.tin = array('i')
+        self.tout = array('i')
+        self.depth = array('i')
+        self.generation = array('i')
+        self.rows_of = {}  # id(person) -> [row, ...]
+
+        for root_pos, root in enumerate(roots):
+            if root_gens is not None:
+                root_gen = root_gens[root_pos]
+            elif getattr(root, "generation", None) is not None:
+                root_gen = root.generation
+            else:
+                root_gen = root.gen_number if isinstance(root.gen_number, int) else 0
+
+            # (person, depth, row to close); a close entry ends the interval once the subtree is numbered
+            stack = [(root, 0, None)]
+            on_path = set()
+            while stack:
+                person, depth, close_row = stack.pop()
+                if close_row is not None:
+                    self.tout[close_row] = len(self.people)
+                    on_path.discard(id(person))
+                    continue
+                if id(person) in on_path:
+                    raise ValueError(f"Cycle in the family tree at {person.name}")
+                on_path.add(id(person))
+                row = len(self.people)
+                self.people.append(person)
+                self.tin.append(row)
+                self.tout.append(row + 1)
+                self.depth.append(depth)
+                self.generation.append(root_gen + depth)
+                self.rows_of.setdefault(id(person), []).append(row)
+                stack.append((person, depth, row))
+                for child in reversed(person.children):
+                    stack.append((child, depth + 1, None))
+
+        # Prefix counts per gender: people of a gender in rows [a, b) = prefix[b] - prefix[a]
+        self._gender_prefix = {}
+        for gender, code in GENDER_CODES.items():
+            prefix = array('i', [0])
+            total = 0
+            for person in self.people:
+                total += GENDER_CODES.get(person.gender, 0) == code
+                prefix.append(total)
+            self._gender_prefix[gender] = prefix
+
+        # Rows per generation, ascending, for bisect range counts
+        self._rows_by_generation = {}
+        for row, gen in enumerate(self.generation):
+            self._rows_by_generation.setdefault(gen, []).append(row)
+
+        # Rows that repeat a person already seen in an earlier row: (row, that earlier row).
+        # Only people attached under two parents produce these, so there are few of them.
+        self._repeat_rows = []
+        self._repeat_prev = []
+        for rows in self.rows_of.values():
+            for prev, row in zip(rows, rows[1:]):
+                self._repeat_rows.append(row)
+                self._repeat_prev.append(prev)
+        order = sorted(range(len(self._repeat_rows)), key=self._repeat_rows.__getitem__)
+        self._repeat_rows = [self._repeat_rows[i] for i in order]
+        self._repeat_prev = [self._repeat_prev[i] for i in order]
+
+    def __len__(self):
+        return len(self.people)
+
+    def _rows(self, person):
+        rows = self.rows_of.get(id(person))
+        if rows is None:
+            raise KeyError(f"{person.name} is not in the indexed trees")
+        return rows
+
+    def _repeats_in(self, start, end):
+        """Rows in [start, end) whose person already appeared earlier in the same range."""
+        lo = bisect.bisect_left(self._repeat_rows, start)
+        hi = bisect.bisect_left(self._repeat_rows, end)
+        return [self._repeat_rows[i] for i in range(lo, hi) if self._repeat_prev[i] >= start]
+
+    def _span(self, person, include_self=True):
+        """Row range [start, end) of person's subtree (their first row)."""
+        row = self._rows(person)[0]
+        return (row if include_self else row + 1), self.tout[row]
+
+    # ---------- relationship checks ----------
+    def is_descendant(self, person, ancestor):
+        """True if `person` is in `ancestor`'s subtree (a person is not their own descendant)."""
+        start, end = self._span(ancestor, include_self=False)
+        return any(start <= row < end for row in self._rows(person))
+
+    def is_ancestor(self, person, descendant):
+        return self.is_descendant(descendant, person)
+
+    # ---------- listings ----------
+    def descendants(self, person, include_self=False):
+        """Everyone below `person`, in tree (pre-)order, each person once."""
+        start, end = self._span(person, include_self)
+        repeats = set(self._repeats_in(start, end))
+        return [self.people[row] for row in range(start, end) if row not in repeats]
+
+    def descendants_in_generation(self, person, generation):
+        """Descendants of `person` in one generation number, in tree order, each person once."""
+        start, end = self._span(person, include_self=False)
+        rows = self._rows_by_generation.get(generation, [])
+        repeats = set(self._repeats_in(start, end))
+        return [self.people[row] for row in rows[bisect.bisect_left(rows, start):bisect.bisect_left(rows, end)]
+                if row not in repeats]
+
+    # ---------- counts ----------
+    def count_descendants(self, person, include_self=False):
+        """Number of distinct people below `person`."""
+        start, end = self._span(person, include_self)
+        return end - start - len(self._repeats_in(start, end))
+
+    def count_by_gender(self, person, include_self=False):
+        """{"Male": n, "Female": n, None: n} over `person`'s descendants (None = gender not set)."""
+        start, end = self._span(person, include_self)
+        counts = {gender: prefix[end] - prefix[start] for gender, prefix in self._gender_prefix.items()}
+        for row in self._repeats_in(start, end):
+            counts[GENDERS[GENDER_CODES.get(self.people[row].gender, 0)]] -= 1
+        return counts
+
+    def count_by_generation(self, person, include_self=False):
+        """{generation number: n} over `person`'s descendants, generations with nobody left out."""
+        start, end = self._span(person, include_self)
+        counts = {}
+        for gen in sorted(self._rows_by_generation):
+            rows = self._rows_by_generation[gen]
+            n = bisect.bisect_left(rows, end) - bisect.bisect_left(rows, start)
+            if n:
+                counts[gen] = n
+        for row in self._repeats_in(start, end):
+            counts[self.generation[row]] -= 1
+        return {gen: n for gen, n in counts.items() if n}
+
+    # ---------- lookups ----------
+    def find(self, name):
+        """People whose English or Nepali name is exactly `name`, in tree order."""
+        seen = set()
+        result = []
+        for person in self.people:
+            if (person.name == name or person.name_nep == name) and id(person) not in seen:
+                seen.add(id(person))
+                result.append(person)
+        return result
+
+    def generation_of(self, person):
+        return self.generation[self._rows(person)[0]]
+
+
+# English relationship words by gender of the relative (Person.gender), None = not recorded
+_KIN_WORDS = {
+    "parent": {"Male": "father", "Female": "mother", None: "parent"},
+    "child": {"Male": "son", "Female": "daughter", None: "child"},
+    "sibling": {"Male": "brother", "Female": "sister", None: "sibling"},
+    "uncle": {"Male": "uncle", "Female": "aunt", None: "parent's sibling"},
+    "nephew": {"Male": "nephew", "Female": "niece", None: "sibling's child"},
+}
+_ORDINALS = ("zeroth", "first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth", "ninth", "tenth")
+_TIMES = {1: "once", 2: "twice", 3: "thrice"}
+
+
+def _ordinal(n):
+    return _ORDINALS[n] if n < len(_ORDINALS) else f"{n}th"
+
+
+def relationship_label(up_a, up_b, gender_b=None):
+    """
+    What B is to A, given how many father links each climbs to reach their closest common ancestor.
+
+    relationship_label(1, 0, "Male") -> "father"; (2, 2) -> "first cousin";
+    (3, 2) -> "first cousin once removed"; (1, 3, "Female") -> "grandniece".
+    """
+    def word(kind):
+        return _KIN_WORDS[kind].get(gender_b, _KIN_WORDS[kind][None])
+
+    if up_a == 0 and up_b == 0:
+        return "self"
+    if up_b == 0:  # B is A's ancestor
+        return "great-" * (up_a - 2) + ("grand" if up_a >= 2 else "") + word("parent")
+    if up_a == 0:  # B is A's descendant
+        return "great-" * (up_b - 2) + ("grand" if up_b >= 2 else "") + word("child")
+    if up_a == 1 and up_b == 1:
+        return word("sibling")
+    if up_b == 1:  # B is a sibling of A's ancestor
+        return "great-" * (up_a - 2) + word("uncle")
+    if up_a == 1:  # B descends from A's sibling
+        return "great-" * (up_b - 3) + ("grand" if up_b >= 3 else "") + word("nephew")
+    degree = min(up_a, up_b) - 1
+    removed = abs(up_a - up_b)
+    label = f"{_ordinal(degree)} cousin"
+    if removed:
+        label += f" {_TIMES.get(removed, f'{removed} times')} removed"
+    return label
+
+
+class RelationshipCalculator:
+    """
+    "How are A and B related?" over the Person.father links, in O(log depth) per pair.
+
+    A binary-lifting table (up[k][i] = the 2**k-th father of person i) is built once, so the
+    closest common ancestor of any two people is found by jumping powers of two instead of
+    walking (or, like the data-father / data-grandfather attributes, stopping three levels up).
+
+        calc = RelationshipCalculator([gopal_32, bishwamvar_34])
+        calc.relationship(person, prajapati_34)   # what prajapati_34 is to person: "grandfather", ...
+    """
+    def __init__(self, roots):
+        self.people = []
+        self.index_of = {}  # id(person) -> index
+        stack = list(reversed(roots))
+        while stack:
+            person = stack.pop()
+            if id(person) in self.index_of:
+                continue  # attached under two parents
+            self.index_of[id(person)] = len(self.people)
+            self.people.append(person)
+            stack.extend(reversed(person.children))
+
+        count = len(self.people)
+        father = array('i', (self.index_of.get(id(p.father), -1) if p.father is not None else -1
+                             for p in self.people))
+
+        # Depth along the father links; a father can come later in the walk (re-attached
+        # children), so fill each unknown chain from its first known ancestor down.
+        depth = array('i', [-1]) * count
+        for i in range(count):
+            chain = []
+            j = i
+            while j >= 0 and depth[j] < 0:
+                chain.append(j)
+                if len(chain) > count:
+                    raise ValueError(f"Cycle in the father links at {self.people[i].name}")
+                j = father[j]
+            d = depth[j] if j >= 0 else -1
+            for k in reversed(chain):
+                d += 1
+                depth[k] = d
+        self.depth = depth
+
+        self.up = [father]
+        for _ in range(1, max(max(depth, default=0).bit_length(), 1)):
+            prev = self.up[-1]
+            self.up.append(array('i', (prev[prev[i]] if prev[i] >= 0 else -1 for i in range(count))))
+
+    def _index(self, person):
+        idx = self.index_of.get(id(person))
+        if idx is None:
+            raise KeyError(f"{person.name} is not in the indexed trees")
+        return idx
+
+    def _lift(self, idx, steps):
+        k = 0
+        while steps and idx >= 0:
+            if steps & 1:
+                idx = self.up[k][idx]
+            steps >>= 1
+            k += 1
+        return idx
+
+    def common_ancestor(self, a, b):
+        """(closest common ancestor, generations up from a, generations up from b), or None if unrelated."""
+        ia, ib = self._index(a), self._index(b)
+        da, db = self.depth[ia], self.depth[ib]
+        if da > db:
+            ia = self._lift(ia, da - db)
+        elif db > da:
+            ib = self._lift(ib, db - da)
+        if ia != ib:
+            for k in range(len(self.up) - 1, -1, -1):
+                if self.up[k][ia] != self.up[k][ib]:
+                    ia, ib = self.up[k][ia], self.up[k][ib]
+            ia = self.up[0][ia]
+            if ia < 0:
+                return None  # different roots
+        ancestor_depth = self.depth[ia]
+        return self.people[ia], da - ancestor_depth, db - ancestor_depth
+
+    def relationship(self, a, b):
+        """What b is to a ("father", "second cousin once removed", ...), or None if they aren't related."""
+        found = self.common_ancestor(a, b)
+        if found is None:
+            return None
+        _, up_a, up_b = found
+        return relationship_label(up_a, up_b, b.gender)
+
+    def relationships_csv(self, in_path, out_path, people_by_key):
+        """
+        Batch mode: label every pair of a CSV.
+
+        Reads `in_path` (columns person_a, person_b; a cell is a variable name from the data
+        file like prajapati_34, or a name that is unique), writes `out_path` with the columns
+        person_a, person_b, relationship, common_ancestor, generations_a, generations_b.
+
+        :param people_by_key: {variable name: Person}, e.g. genealogy_snapshot.load_people().
+        :return: number of pairs written.
+        """
+        import csv
+
+        by_name = {}
+        for person in self.people:
+            for name in {person.name, person.name_nep} - {None}:
+                by_name.setdefault(name, []).append(person)
+        var_of = {}
+        for var, person in people_by_key.items():
+            var_of.setdefault(id(person), var)
+
+        def resolve(key):
+            key = key.strip()
+            if key in people_by_key:
+                return people_by_key[key]
+            matches = by_name.get(key, [])
+            if len(matches) != 1:
+                raise ValueError(f"{key!r} matches {len(matches)} people; use the variable name (e.g. prajapati_34)")
+            return matches[0]
+
+        written = 0
+        with open(in_path, newline="", encoding="utf-8") as f_in, \
+             open(out_path, "w", newline="", encoding="utf-8") as f_out:
+            reader = csv.DictReader(f_in)
+            writer = csv.writer(f_out)
+            writer.writerow(["person_a", "person_b", "relationship", "common_ancestor", "generations_a", "generations_b"])
+            for row in reader:
+                try:
+                    a, b = resolve(row["person_a"]), resolve(row["person_b"])
+                except ValueError as e:
+                    raise ValueError(f"{in_path} line {reader.line_num}: {e}") from None
+                found = self.common_ancestor(a, b)
+                if found is None:
+                    writer.writerow([row["person_a"], row["person_b"], "not related", "", "", ""])
+                else:
+                    ancestor, up_a, up_b = found
+                    writer.writerow([row["person_a"], row["person_b"], relationship_label(up_a, up_b, b.gender),
+                                     var_of.get(id(ancestor), ancestor.name), up_a, up_b])
+                written += 1
+        return written
+
+
+if __name__ == "__main__":
+    # python genealogy_query.py Prajapati               -> descendant counts for every Prajapati
+    # python genealogy_query.py --pairs pairs.csv -o out.csv -> relationship of every pair in the CSV
+    import argparse
+    from genealogy_snapshot import load_people
+
+    parser = argparse.ArgumentParser(description="Ask questions about the Sisneri Poudel family tree.")
+    parser.add_argument("names", nargs="*", help="print descendant counts for everyone with these names")
+    parser.add_argument("--pairs", help="CSV with person_a, person_b columns to label with relationships")
+    parser.add_argument("-o", "--out", default="relationships.csv", help="output CSV for --pairs")
+    args = parser.parse_args()
+
+    people = load_people()
+    roots = [people["gopal_32"], people["bishwamvar_34"]]
+    if args.pairs:
+        count = RelationshipCalculator(roots).relationships_csv(args.pairs, args.out, people)
+        print(f"✅ {args.out} written with {count} relationships.")
+        sys.exit(0)
+
+    query = FamilyQuery(roots)
+    for name in args.names or ["Prajapati"]:
+        for person in query.find(name):
+            by_gender = query.count_by_gender(person)
+            print(f"{person.name} ({person.name_nep}), generation {query.generation_of(person)}: "
+                  f"{query.count_descendants(person)} descendants "
+                  f"({by_gender['Male']} male, {by_gender['Female']} female, {by_gender[None]} not recorded)")
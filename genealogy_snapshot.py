@@ -0,0 +1,138 @@
+"""Compiled binary snapshot of genealogy_poudel_data.py, for loading the Person forest without executing it"""
+import hashlib, importlib, marshal, os, sys
+
+from genealogy_class import Person
+from genealogy_io import write_atomic
+
+# Next to this module, so importing genealogy works from any working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(HERE, "genealogy_poudel_data.py")
+DATA_MODULE = "genealogy_poudel_data"
+SNAPSHOT_FILE = os.path.join(HERE, "genealogy_poudel_data.snapshot")
+# Bump whenever the layout below (or Person's attributes) changes
+SNAPSHOT_VERSION = 2
+
+# Per-person scalar fields, in snapshot column order
+FIELDS = ("name", "name_nep", "gender", "birth_year", "death_year", "place", "comment",
+          "gen_number", "father_nep", "grandfather_nep", "edit")
+
+
+def source_hash(source_path=DATA_FILE):
+    with open(source_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _import_source(source_path):
+    """Execute the data file as its module and return {variable: Person} in definition order."""
+    module_dir = os.path.dirname(os.path.abspath(source_path))
+    if module_dir not in sys.path:
+        sys.path.insert(0, module_dir)
+    module = importlib.import_module(DATA_MODULE)
+    return {var: obj for var, obj in vars(module).items() if isinstance(obj, Person)}
+
+
+def compile_snapshot(source_path=DATA_FILE, snapshot_path=SNAPSHOT_FILE, people=None):
+    """
+    Serialize the linked forest defined in the data file into one compact marshal blob.
+
+    Every Person reachable from a module variable is stored once as a row; children, father
+    and grandfather are stored as row numbers, so the exact links (including people attached
+    under two parents) come back as they were. Variable bindings are kept in source order,
+    aliases like `root_person = gopal_32` included.
+
+    :param people: {variable: Person} to store; defaults to importing the data file.
+    :return: the snapshot path.
+    """
+    if people is None:
+        people = _import_source(source_path)
+
+    rows = []
+    row_of = {}
+
+    def row(person):
+        if id(person) not in row_of:
+            row_of[id(person)] = len(rows)
+            rows.append(person)
+        return row_of[id(person)]
+
+    bindings = [(var, row(person)) for var, person in people.items()]
+    # children / links can reach people that aren't bound to any variable
+    pending = list(rows)
+    while pending:
+        person = pending.pop()
+        for linked in list(person.children) + [person.father, person.grandfather]:
+            if linked is not None and id(linked) not in row_of:
+                row(linked)
+                pending.append(linked)
+
+    def link(person):
+        return row_of[id(person)] if person is not None else -1
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "source_hash": source_hash(source_path),
+        "fields": [tuple(getattr(p, field) for field in FIELDS) for p in rows],
+        "children": [tuple(row_of[id(c)] for c in p.children) for p in rows],
+        "father": [link(p.father) for p in rows],
+        "grandfather": [link(p.grandfather) for p in rows],
+        "bindings": bindings,
+    }
+    write_atomic(snapshot_path, marshal.dumps(snapshot))
+    return snapshot_path
+
+
+def read_snapshot(snapshot_path=SNAPSHOT_FILE, expected_hash=None):
+    """Return the raw snapshot dict, or None if it is missing, unreadable, stale or from another version."""
+    try:
+        with open(snapshot_path, "rb") as f:
+            snapshot = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if expected_hash is not None and snapshot.get("source_hash") != expected_hash:
+        return None
+    return snapshot
+
+
+def people_from_snapshot(snapshot):
+    """Rebuild linked Person objects from a snapshot; returns {variable: Person} in source order."""
+    new = Person.__new__
+    people = []
+    for values in snapshot["fields"]:
+        person = new(Person)
+        person.__dict__ = dict(zip(FIELDS, values))
+        person.generation = None  # per build, not part of the data (genealogy.resolve_generations)
+        people.append(person)
+    for person, kids, father, grandfather in zip(people, snapshot["children"],
+                                                 snapshot["father"], snapshot["grandfather"]):
+        person.children = [people[k] for k in kids]
+        person.father = people[father] if father >= 0 else None
+        person.grandfather = people[grandfather] if grandfather >= 0 else None
+    return {var: people[idx] for var, idx in snapshot["bindings"]}
+
+
+def load_people(source_path=DATA_FILE, snapshot_path=SNAPSHOT_FILE, refresh=True):
+    """
+    {variable: Person} for the data file, from the snapshot when it matches the source.
+
+    When the snapshot is missing or the data file's hash changed, falls back to importing
+    the .py source (and, with refresh=True, recompiles the snapshot for next time).
+    """
+    expected = source_hash(source_path)
+    snapshot = read_snapshot(snapshot_path, expected_hash=expected)
+    if snapshot is not None:
+        return people_from_snapshot(snapshot)
+
+    people = _import_source(source_path)
+    if refresh:
+        try:
+            compile_snapshot(source_path, snapshot_path, people=people)
+        except OSError as e:
+            print(f"⚠️  could not write {snapshot_path}: {e}")
+    return people
+
+
+if __name__ == "__main__":
+    path = compile_snapshot()
+    print(f"✅ {path} compiled from {DATA_FILE} ({os.path.getsize(path)} bytes).")
@@ -0,0 +1,331 @@
+"""Columnar, array-backed store for the whole genealogy forest (alternative to linked Person objects)"""
+from array import array
+
+GENDER_CODES = {None: 0, "Male": 1, "Female": 2}
+GENDERS = {code: gender for gender, code in GENDER_CODES.items()}
+
+# Person attributes kept as ids into the shared value pool, one array('i') column each.
+# grandfather_nep is Person's own copy (set at add_child time), which Person.to_dict hands on.
+VALUE_FIELDS = ("name", "name_nep", "gender", "birth_year", "death_year", "place", "comment", "gen_number",
+                "edit", "grandfather_nep")
+NONE_ID = 0  # pool id of None
+
+
+class TreeStore:
+    """
+    Whole forest in parallel arrays, indexed by node number.
+
+    Nodes are numbered in pre-order (root first, then each child's subtree in order), so every
+    subtree is one contiguous index range. Links are parent / first_child / next_sibling indices
+    (-1 when absent). Every Person attribute is an id into one pool of distinct values (names
+    repeat a lot, so each string is kept once), with id 0 meaning None.
+
+    After the last node there is one sentinel row whose links are -1 and whose values are all None.
+    A -1 link therefore indexes the sentinel, so flat_records / to_dict chase father links and look
+    up names with map() over whole column slices, without a per-node "is there a father" branch.
+
+    `parent` is the structural parent (whose children list the row came from), while `father` /
+    `grandfather` mirror the Person.father / Person.grandfather links. They differ only when the
+    data attaches one Person under two parents, and the renderers read the links, so both are kept.
+
+    Trade-offs, measured with helper/bench_store.py on 10k-100k person synthetic forests:
+      - retained memory is about 1/8 of the Person graph's (7 MB vs 59 MB at 100k)
+      - walk() is about 4.5x faster than walking Person.children
+      - flat_records is about 1.3x slower than flatten_person and to_dict 1.1-1.35x slower than
+        Person.to_dict: building the output dicts dominates both, and the store has to look every
+        name up through its columns where the Person versions read attributes
+      - rendering through PersonView is 1.1-1.5x slower than rendering the Person graph
+    So it pays off for holding large merged forests and for walks / counts over them, not for
+    speeding up the current build, which keeps rendering the Person graph.
+
+    Build it from the existing graphs:
+        store = TreeStore.from_roots([gopal_32, bishwamvar_34])
+    """
+    def __init__(self):
+        self.parent = array('i')
+        self.father = array('i')
+        self.grandfather = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.depth = array('i')
+        self.generation = array('i')
+        self.fields = {field: array('i') for field in VALUE_FIELDS}
+        self.values = [None]  # the value pool; fields[field][idx] is an index into it
+        self.roots = []
+        self._views = {}  # idx -> PersonView, so a row always has the same view object
+
+    def __len__(self):
+        return len(self.parent) - 1  # minus the sentinel
+
+    # ---------- building ----------
+    @classmethod
+    def from_roots(cls, roots, root_gens=None):
+        """
+        Flatten linked Person forests into a TreeStore.
+
+        :param roots: list of root Person objects (e.g. [gopal_32, bishwamvar_34]).
+        :param root_gens: optional generation number per root; defaults to the root's resolved
+                          generation (genealogy.resolve_generations), else root.gen_number (or 0).
+        """
+        store = cls()
+        pool_ids = {}  # (type, value) -> pool id; keyed by type too so 1 and True stay apart
+        index_of = {}  # id(person) -> first node index, to resolve father / grandfather links
+        links = []  # (father, grandfather) Person objects per row
+
+        def add_value(field, value):
+            if value is None:
+                store.fields[field].append(NONE_ID)
+                return
+            key = (type(value), value)
+            value_id = pool_ids.get(key)
+            if value_id is None:
+                value_id = pool_ids[key] = len(store.values)
+                store.values.append(value)
+            store.fields[field].append(value_id)
+
+        for root_pos, root in enumerate(roots):
+            if root_gens is not None:
+                root_gen = root_gens[root_pos]
+            elif getattr(root, "generation", None) is not None:
+                root_gen = root.generation
+            else:
+                root_gen = root.gen_number if isinstance(root.gen_number, int) else 0
+
+            # explicit stack of (person, parent index, depth); children pushed reversed to keep order
+            stack = [(root, -1, 0)]
+            prev_sibling = {}  # parent index -> last child index seen so far
+            while stack:
+                person, parent_idx, depth = stack.pop()
+                idx = len(store.parent)
+                index_of.setdefault(id(person), idx)
+                links.append((person.father, getattr(person, "grandfather", None)))
+                if parent_idx < 0:
+                    store.roots.append(idx)
+
+                store.parent.append(parent_idx)
+                store.first_child.append(-1)
+                store.next_sibling.append(-1)
+                store.depth.append(depth)
+                store.generation.append(root_gen + depth)
+                for field in VALUE_FIELDS:
+                    add_value(field, getattr(person, field, None))
+
+                if parent_idx >= 0:
+                    if parent_idx in prev_sibling:
+                        store.next_sibling[prev_sibling[parent_idx]] = idx
+                    else:
+                        store.first_child[parent_idx] = idx
+                    prev_sibling[parent_idx] = idx
+
+                for child in reversed(person.children):
+                    stack.append((child, idx, depth + 1))
+
+        # Links can point forward (a re-attached child), so resolve them once every row exists.
+        # People outside the given roots are not stored; links to them become -1.
+        for father, grandfather in links:
+            store.father.append(index_of.get(id(father), -1) if father is not None else -1)
+            store.grandfather.append(index_of.get(id(grandfather), -1) if grandfather is not None else -1)
+
+        # the sentinel row that -1 links land on
+        for column in (store.parent, store.father, store.grandfather, store.first_child, store.next_sibling):
+            column.append(-1)
+        store.depth.append(0)
+        store.generation.append(0)
+        for column in store.fields.values():
+            column.append(NONE_ID)
+        return store
+
+    # ---------- column access ----------
+    def get(self, field, idx):
+        return self.values[self.fields[field][idx]]
+
+    def column(self, field, rows):
+        """Iterator over one field's values for an iterable of node indices (-1 gives None)."""
+        return map(self.values.__getitem__, map(self.fields[field].__getitem__, rows))
+
+    def name(self, idx, print_language="en"):
+        return self.get("name" if print_language == "en" else "name_nep", idx)
+
+    def children(self, idx):
+        """Yield child indices of a node, in order."""
+        child = self.first_child[idx]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def ancestor(self, idx, steps):
+        """Index of the ancestor `steps` levels up along the father links (1 = father), or -1."""
+        while idx >= 0 and steps > 0:
+            idx = self.father[idx]
+            steps -= 1
+        return idx
+
+    def subtree_end(self, idx):
+        """One past the last index of the subtree rooted at idx (subtrees are contiguous)."""
+        # the subtree ends where the next sibling of idx or of its nearest ancestor that has one starts
+        node = idx
+        while True:
+            if self.next_sibling[node] >= 0:
+                return self.next_sibling[node]
+            if self.parent[node] < 0:
+                break
+            node = self.parent[node]
+        # no later sibling on the path up: the subtree runs to the end of its root's tree
+        root_pos = self.roots.index(node)
+        return self.roots[root_pos + 1] if root_pos + 1 < len(self.roots) else len(self)
+
+    # ---------- iteration APIs ----------
+    def walk(self, root):
+        """
+        Pre-order walk of one tree, the same order print_tree renders in.
+
+        Yields (idx, level, is_last) where is_last says whether idx is the last child of its parent
+        (always True for the root). Pre-order is index order, so this is a zip over column slices.
+        """
+        end = self.subtree_end(root)
+        levels = self.depth[root:end]
+        if self.depth[root]:
+            levels = map((-self.depth[root]).__add__, levels)
+        is_last = [sibling < 0 for sibling in self.next_sibling[root:end]]
+        is_last[0] = True
+        return zip(range(root, end), levels, is_last)
+
+    def flat_records(self, root, root_gen=None):
+        """
+        Yield the flat search records update_index_html_in_place embeds in index.html,
+        in the same order and with the same keys as flatten_person.
+        """
+        if root_gen is None:
+            root_gen = self.generation[root]
+        end = self.subtree_end(root)
+        rows = range(root, end)
+        father = self.father[root:end]
+        grandfather = array('i', map(self.father.__getitem__, father))
+        ggfather = array('i', map(self.father.__getitem__, grandfather))
+        gens = self.generation[root:end]
+        base = self.generation[root] - root_gen
+        if base:
+            gens = map((-base).__add__, gens)
+        for (name, name_nep, birth_year, gen_number, father_name, grandfather_name, ggfather_name,
+             father_nep, grandfather_nep, ggfather_nep) in zip(
+                self.column("name", rows), self.column("name_nep", rows), self.column("birth_year", rows), gens,
+                self.column("name", father), self.column("name", grandfather), self.column("name", ggfather),
+                self.column("name_nep", father), self.column("name_nep", grandfather),
+                self.column("name_nep", ggfather)):
+            yield {
+                "name": name,
+                "name_nep": name_nep,
+                "birth_year": birth_year,
+                "gen_number": gen_number,
+                "father": father_name,
+                "grandfather": grandfather_name,
+                "ggfather": ggfather_name,
+                "father_nep": father_nep,
+                "grandfather_nep": grandfather_nep,
+                "ggfather_nep": ggfather_nep,
+            }
+
+    def to_dict(self, root):
+        """Nested dict for one tree, identical to Person.to_dict() on the original root."""
+        end = self.subtree_end(root)
+        rows = range(root, end)
+        # Person.to_dict passes children the structural parent's names, its `father` argument
+        # (the structural grandparent) and the parent's own grandfather_nep copy
+        parent = self.parent[root:end]
+        grandparent = array('i', map(self.parent.__getitem__, parent))
+        entries = [
+            {
+                "name": name,
+                "name_nep": name_nep,
+                "gender": gender,
+                "birth_year": birth_year,
+                "death_year": death_year,
+                "place": place,
+                "gen_number": gen_number,
+                "comment": comment,
+                "father": father,
+                "father_nep": father_nep,
+                "grandfather": grandfather,
+                "grandfather_nep": grandfather_nep,
+                "children": [],
+            }
+            for (name, name_nep, gender, birth_year, death_year, place, gen_number, comment, father, father_nep,
+                 grandfather, grandfather_nep) in zip(
+                self.column("name", rows), self.column("name_nep", rows), self.column("gender", rows),
+                self.column("birth_year", rows), self.column("death_year", rows), self.column("place", rows),
+                self.column("gen_number", rows), self.column("comment", rows),
+                self.column("name", parent), self.column("name_nep", parent),
+                self.column("name", grandparent), self.column("grandfather_nep", parent))
+        ]
+        # the top of the export was called with no arguments, and its children got father=None as grandfather
+        top = entries[0]
+        top["father"] = top["father_nep"] = top["grandfather"] = top["grandfather_nep"] = None
+        for child in self.children(root):
+            entries[child - root]["grandfather"] = None
+
+        # pre-order, so appending each row to its parent's list keeps the children in order
+        children_of = [entry["children"] for entry in entries]
+        parent_pos = parent[1:] if not root else map((-root).__add__, parent[1:])
+        for entry, pos in zip(entries[1:], parent_pos):
+            children_of[pos].append(entry)
+        return top
+
+    def view(self, idx):
+        """Person-like read-only view of a node, for code written against Person attributes (None for -1)."""
+        if idx < 0:
+            return None
+        view = self._views.get(idx)
+        if view is None:
+            view = self._views[idx] = PersonView(self, idx)
+        return view
+
+    def root_views(self):
+        return [self.view(idx) for idx in self.roots]
+
+
+class PersonView:
+    """
+    Person-shaped view onto one TreeStore row.
+
+    Exposes the attributes print_tree / flatten_person read (name, name_nep, gender, place,
+    birth_year, comment, edit, gen_number, generation, children, father, grandfather), so the
+    existing renderers can run over a TreeStore unchanged. Views are cached per row by
+    TreeStore.view, so `is` comparisons between linked people work as on Person.
+    """
+    __slots__ = ("store", "idx")
+
+    def __init__(self, store, idx):
+        self.store = store
+        self.idx = idx
+
+    name = property(lambda self: self.store.get("name", self.idx))
+    name_nep = property(lambda self: self.store.get("name_nep", self.idx))
+    gender = property(lambda self: self.store.get("gender", self.idx))
+    place = property(lambda self: self.store.get("place", self.idx))
+    comment = property(lambda self: self.store.get("comment", self.idx))
+    edit = property(lambda self: self.store.get("edit", self.idx))
+    birth_year = property(lambda self: self.store.get("birth_year", self.idx))
+    death_year = property(lambda self: self.store.get("death_year", self.idx))
+    gen_number = property(lambda self: self.store.get("gen_number", self.idx))
+    grandfather_nep = property(lambda self: self.store.get("grandfather_nep", self.idx))
+    generation = property(lambda self: self.store.generation[self.idx])
+
+    @property
+    def children(self):
+        return [self.store.view(child) for child in self.store.children(self.idx)]
+
+    @property
+    def father(self):
+        return self.store.view(self.store.father[self.idx])
+
+    @property
+    def grandfather(self):
+        return self.store.view(self.store.grandfather[self.idx])
+
+    @property
+    def father_nep(self):
+        father = self.father
+        return father.name_nep if father else ""
+
+    def to_dict(self):
+        return self.store.to_dict(self.idx)
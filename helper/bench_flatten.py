@@ -0,0 +1,71 @@
+# Benchmark flatten_person (the index.html record flattener) on synthetic trees of growing size.
+# The old recursive version copied every record into each ancestor's list (O(N·depth)); the
+# explicit-stack generator should scale linearly, so ms / 1k people should stay flat.
+# The trees come from helper/synthetic_forest.py, one root aimed at a generation per 200 people,
+# so they get deeper as they grow.
+# Run from the repo root:  python helper/bench_flatten.py [max_people]
+import os, sys, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+from genealogy import flatten_person, resolve_generations
+from synthetic_forest import synthetic_forest, forest_stats
+
+
+def flatten_person_recursive(person, cur_gen):
+    """The previous implementation, kept here as the baseline."""
+    entry = {
+        "name": person.name,
+        "name_nep": person.name_nep,
+        "birth_year": person.birth_year,
+        "gen_number": cur_gen,
+        "father": person.father.name if person.father else None,
+        "grandfather": person.father.father.name if person.father and person.father.father else None,
+        "ggfather": (
+            person.father.father.father.name
+            if person.father and person.father.father and person.father.father.father
+            else None
+        ),
+        "father_nep": person.father.name_nep if person.father else None,
+        "grandfather_nep": person.father.father.name_nep if person.father and person.father.father else None,
+        "ggfather_nep": (
+            person.father.father.father.name_nep
+            if person.father and person.father.father and person.father.father.father
+            else None
+        ),
+    }
+    people = [entry]
+    for child in person.children:
+        people.extend(flatten_person_recursive(child, cur_gen + 1))
+    return people
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    max_people = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    sys.setrecursionlimit(max(10_000, max_people))  # the recursive baseline goes one frame per generation
+
+    print(f"{'people':>8}{'depth':>7}{'stack ms':>10}{'ms/1k':>8}{'recursive ms':>14}{'ms/1k':>8}")
+    count = 25_000
+    while count <= max_people:
+        root, = synthetic_forest(count, roots=1, depth=count // 200)
+        resolve_generations([root])
+        depth = forest_stats([root])[1] + 1
+        new = list(flatten_person(root))
+        if new != flatten_person_recursive(root, root.generation):
+            sys.exit(f"❌ flatten_person differs from the recursive version at {count} people")
+        t_new = best_of(lambda: list(flatten_person(root)))
+        t_old = best_of(lambda: flatten_person_recursive(root, root.generation))
+        print(f"{count:>8}{depth:>7}{t_new * 1000:>10.1f}{t_new * 1e6 / count:>8.2f}"
+              f"{t_old * 1000:>14.1f}{t_old * 1e6 / count:>8.2f}")
+        count *= 2
+    print("✅ same records as the recursive version at every size")
@@ -0,0 +1,44 @@
+# Compare memory / build time of Person vs CompactPerson on the real data file.
+# Run from the repo root:  python helper/bench_person_memory.py
+import os, sys, time, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from genealogy_class import Person, CompactPerson
+
+DATA_FILE = "genealogy_poudel_data.py"
+
+
+def load_forest(code):
+    """Execute the (already class-swapped) data file; return its namespace."""
+    namespace = {"__name__": "genealogy_poudel_data"}
+    exec(code, namespace)
+    return namespace
+
+
+def measure(person_cls, code):
+    # Time an untraced load first; tracemalloc itself slows allocation down a lot
+    start = time.perf_counter()
+    load_forest(code)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    namespace = load_forest(code)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    people = {id(obj): obj for obj in namespace.values() if isinstance(obj, person_cls)}
+    return len(people), current, peak, elapsed
+
+
+if __name__ == "__main__":
+    with open(DATA_FILE, encoding="utf-8") as f:
+        source = f.read()
+
+    print(f"{'class':<14}{'people':>8}{'retained KB':>14}{'peak KB':>10}{'bytes/person':>14}{'build ms':>10}")
+    for person_cls in (Person, CompactPerson):
+        # Swap the class the data file imports, compile outside the measured region
+        code = compile(source.replace("from genealogy_class import Person",
+                                      f"from genealogy_class import {person_cls.__name__} as Person"),
+                       DATA_FILE, "exec")
+        count, current, peak, elapsed = measure(person_cls, code)
+        print(f"{person_cls.__name__:<14}{count:>8}{current / 1024:>14.1f}{peak / 1024:>10.1f}"
+              f"{current / max(count, 1):>14.1f}{elapsed * 1000:>10.1f}")
@@ -0,0 +1,150 @@
+# Benchmark the build's hot paths on synthetic forests (helper/synthetic_forest.py) of growing size.
+# For each size it times Person.to_dict, flatten_person, the tree page render (print_tree via
+# export_roots_trees), the virtualized row page (export_tree_rows), update_index_html_in_place and
+# update_timeline_html, and records each stage's peak traced memory.
+# Run from the repo root:
+#   python helper/bench_pipeline.py                               # 3k, 30k, 300k people
+#   python helper/bench_pipeline.py --sizes 3000 30000 --json bench.json
+#   python helper/bench_pipeline.py --branching 1393 799 458 204 89 42 13 6 1 1 2   # real-data family sizes
+#   python helper/bench_pipeline.py --baseline bench.json         # flag stages >20% slower / bigger
+import argparse, contextlib, io, json, os, shutil, sys, tempfile, time, tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+from genealogy import (export_roots_trees, export_tree_rows, flatten_person, update_index_html_in_place,
+                       update_timeline_html, update_timeline_html_bs4)
+from synthetic_forest import synthetic_forest, forest_stats
+
+REGRESSION_RATIO = 1.2
+NOISE_MS = 5  # slowdowns smaller than this are timer noise, not regressions
+
+
+def synthetic_timeline(count):
+    """TIMELINE_DATA-shaped rows, one per 100 people, mixing 2- and 3-item rows like the real data."""
+    rows = [(f"वि.सं {1600 + i}", f"घटना {i}", "विवरण " * 20) if i % 3 else (f"वि.सं {1600 + i}", f"घटना {i}")
+            for i in range(max(count // 100, 1))]
+    return {"timeline_nep": rows, "timeline_eng": [(f"{1550 + i} AD", f"Event {i}", "Details " * 20)
+                                                   for i in range(len(rows))]}
+
+
+def measure(fn, memory=True):
+    """(best wall seconds of untraced runs, peak traced bytes of one more run or None)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        elapsed = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            fn()
+            elapsed = min(elapsed, time.perf_counter() - start)
+            if elapsed > 0.5:
+                break  # slow stages are stable enough from one run
+        peak = None
+        if memory:
+            tracemalloc.start()
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return elapsed, peak
+
+
+def stages_for(roots, count, tmp):
+    labelled = [(f"synthetic_{root.gen_number}", root) for root in roots]
+    index_path = os.path.join(tmp, "index.html")
+    with open("timeline.html", encoding="utf-8") as f:
+        timeline_html = f.read()
+    timeline = synthetic_timeline(count)
+
+    def update_index():
+        shutil.copyfile("index.html", index_path)
+        update_index_html_in_place(labelled, index_path=index_path)
+
+    stages = {
+        "to_dict": lambda: [root.to_dict() for root in roots],
+        "flatten_person": lambda: [list(flatten_person(root)) for root in roots],
+        "print_tree (en)": lambda: export_roots_trees(roots, print_language="en",
+                                                      out_html_path=os.path.join(tmp, "tree_en.html"),
+                                                      out_txt_path=os.path.join(tmp, "tree_en.txt")),
+        "tree rows (en)": lambda: export_tree_rows(roots, print_language="en",
+                                                   out_html_path=os.path.join(tmp, "rows_en.html"),
+                                                   out_txt_path=os.path.join(tmp, "rows_en.txt")),
+        "update_index_html": update_index,
+        "update_timeline_html": lambda: update_timeline_html(timeline_html, timeline),
+    }
+    try:
+        import bs4  # noqa: F401 - the old BeautifulSoup path, only if installed
+        stages["timeline (bs4)"] = lambda: update_timeline_html_bs4(timeline_html, timeline)
+    except ImportError:
+        pass
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the genealogy build on synthetic forests.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3_000, 30_000, 300_000])
+    parser.add_argument("--roots", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=20)
+    parser.add_argument("--branching", type=float, nargs="+", metavar="W",
+                        help="weights for 0, 1, 2, ... sons per man instead of the Poisson default "
+                             "(the real data is about 1393 799 458 204 89 42 13 6 1 1 2); overrides --depth")
+    parser.add_argument("--female-ratio", type=float, default=0.03)
+    parser.add_argument("--comment-density", type=float, default=0.01)
+    parser.add_argument("--edit-density", type=float, default=0.007)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced (slower) memory pass")
+    parser.add_argument("--json", help="save the results here")
+    parser.add_argument("--baseline", help="results saved earlier with --json to compare against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = {(r["people"], r["stage"]): r for r in json.load(f)["results"]}
+
+    results = []
+    regressions = 0
+    print(f"{'people':>8} {'stage':<22}{'ms':>10}{'µs/person':>11}{'peak MB':>9}{'vs base':>9}")
+    for count in args.sizes:
+        start = time.perf_counter()
+        roots = synthetic_forest(count, roots=args.roots, depth=args.depth, branching=args.branching,
+                                 female_ratio=args.female_ratio, comment_density=args.comment_density,
+                                 edit_density=args.edit_density, seed=args.seed)
+        build_seconds = time.perf_counter() - start
+        people, max_depth, _, _ = forest_stats(roots)
+        # Person.to_dict recurses two frames per generation, and --branching forests can get very deep
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * max_depth + 1000))
+        print(f"{people:>8} {'(generate forest)':<22}{build_seconds * 1000:>10.1f}"
+              f"{build_seconds * 1e6 / people:>11.2f}  {max_depth + 1} generations")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for stage, fn in stages_for(roots, count, tmp).items():
+                seconds, peak = measure(fn, memory=not args.no_memory)
+                result = {"people": people, "stage": stage, "ms": seconds * 1000,
+                          "peak_mb": peak / 2**20 if peak is not None else None}
+                results.append(result)
+
+                compare = ""
+                base = baseline.get((people, stage))
+                if base:
+                    ratio = result["ms"] / base["ms"] if base["ms"] else 1.0
+                    compare = f"{ratio:.2f}x"
+                    grew = (result["peak_mb"] or 0) > (base.get("peak_mb") or float("inf")) * REGRESSION_RATIO
+                    slower = ratio > REGRESSION_RATIO and result["ms"] - base["ms"] > NOISE_MS
+                    if slower or grew:
+                        compare += " ⚠️"
+                        regressions += 1
+                peak_text = f"{result['peak_mb']:.1f}" if peak is not None else "-"
+                print(f"{people:>8} {stage:<22}{result['ms']:>10.1f}{result['ms'] * 1000 / people:>11.2f}"
+                      f"{peak_text:>9}{compare:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"✅ results saved to {args.json}")
+    if args.baseline:
+        print(f"{'⚠️ ' if regressions else '✅'} {regressions} stage(s) more than "
+              f"{(REGRESSION_RATIO - 1) * 100:.0f}% slower or bigger than {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# Compare the columnar TreeStore (genealogy_store.py) with the linked Person graph on synthetic forests
+# (helper/synthetic_forest.py): retained memory, the pre-order walk, flat_records vs flatten_person,
+# to_dict vs Person.to_dict, and rendering through PersonView vs the Person graph.
+# Outputs are checked against the Person versions at every size before anything is timed.
+# On 100k people (1 CPU): memory 59 -> 7 MB, walk 133 -> 29 ms, flat records 236 -> 308 ms,
+# to_dict 614 -> 674 ms, render 2.7 -> 3.0 s; see the TreeStore docstring for what that means.
+# Run from the repo root:  python helper/bench_store.py [people ...]    (default 10k 100k)
+import gc, os, sys, time, tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+from genealogy import flatten_person, iter_tree_lines, resolve_generations
+from genealogy_store import TreeStore
+from synthetic_forest import synthetic_forest
+
+
+def person_walk(root):
+    """The Person-graph twin of TreeStore.walk: (person, level, is_last) in pre-order."""
+    stack = [(root, 0, True)]
+    while stack:
+        person, level, is_last = stack.pop()
+        yield person, level, is_last
+        kids = person.children
+        for pos in range(len(kids) - 1, -1, -1):
+            stack.append((kids[pos], level + 1, pos == len(kids) - 1))
+
+
+def retained(build):
+    """(result, bytes still allocated after build())."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'people':>8}  {'path':<22}{'Person':>12}{'TreeStore':>12}{'ratio':>8}")
+    for count in sizes:
+        roots, person_bytes = retained(lambda: synthetic_forest(count))
+        resolve_generations(roots)
+        store, store_bytes = retained(lambda: TreeStore.from_roots(roots))
+        views = store.root_views()
+
+        for root, idx, view in zip(roots, store.roots, views):
+            if list(store.flat_records(idx)) != list(flatten_person(root)):
+                sys.exit(f"❌ flat_records differs from flatten_person at {count} people")
+            if store.to_dict(idx) != root.to_dict():
+                sys.exit(f"❌ to_dict differs from Person.to_dict at {count} people")
+            if list(iter_tree_lines(view)) != list(iter_tree_lines(root)):
+                sys.exit(f"❌ rendering through PersonView differs at {count} people")
+
+        rows = [
+            ("retained memory (MB)", person_bytes / 1e6, store_bytes / 1e6),
+            ("walk (ms)", best_of(lambda: [list(person_walk(r)) for r in roots]) * 1000,
+             best_of(lambda: [list(store.walk(i)) for i in store.roots]) * 1000),
+            ("flat records (ms)", best_of(lambda: [list(flatten_person(r)) for r in roots]) * 1000,
+             best_of(lambda: [list(store.flat_records(i)) for i in store.roots]) * 1000),
+            ("to_dict (ms)", best_of(lambda: [r.to_dict() for r in roots]) * 1000,
+             best_of(lambda: [store.to_dict(i) for i in store.roots]) * 1000),
+            ("render (ms)", best_of(lambda: [list(iter_tree_lines(r)) for r in roots], 1) * 1000,
+             best_of(lambda: [list(iter_tree_lines(v)) for v in views], 1) * 1000),
+        ]
+        for label, person_value, store_value in rows:
+            print(f"{count:>8}  {label:<22}{person_value:>12.1f}{store_value:>12.1f}{store_value / person_value:>7.2f}x")
+    print("✅ TreeStore outputs match the Person graph at every size")
@@ -1,14 +1,221 @@
-# ...place this in a utility script...
-import re
+# Validate genealogy_poudel_data.py without executing it: parse it once with `ast`, build the
+# parent -> child graph from the Person(...) assignments and add_child / add_children calls, and report
+#   - errors:   names used before (or without) being defined, cycles
+#   - warnings: parents with add_child(ren) on several lines, the same child added twice,
+#               children attached under two different parents, Person objects never attached
+#               to the roots (orphans), gen-suffix mismatches (a _41 child under a _39 parent),
+#               and variables re-assigned to a new Person
+# Fast enough to run on every save (one parse + one pass over the graph).
+# Run from the repo root:
+#   python helper/check_dup_child_addition.py [data_file] [--roots gopal_32 bishwamvar_34] [--strict]
+# Exits 1 when there are errors (or any warning, with --strict).
+import argparse, ast, re, sys, time
 from collections import defaultdict
 
-calls = defaultdict(list)
-with open("genealogy_poudel_data.py") as f:
-    for i, line in enumerate(f, 1):
-        m = re.match(r'(\w+)\.add_child(?:ren)?\(', line)
-        if m:
-            calls[m.group(1)].append(i)
+DATA_FILE = "genealogy_poudel_data.py"
+ROOTS = ("gopal_32", "bishwamvar_34")
 
-for person, lines in calls.items():
-    if len(lines) > 1:
-        print(f"{person} called add_child/add_children {len(lines)} times at lines {lines}")
\ No newline at end of file
+
+def var_gen(name):
+    """Generation from the variable name, the way genealogy.py's PersonIndex reads it (gopal_32 -> 32)."""
+    m = re.search(r'_(\d+)', name)
+    return int(m.group(1)) if m else None
+
+
+def _is_person_call(node):
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "Person"
+
+
+def parse_data(source, filename=DATA_FILE):
+    """
+    One pass over the module's top-level statements.
+
+    :return: (defined, aliases, calls, anonymous) where
+      defined   = {var: [line, ...]} for every `var = Person(...)`
+      aliases   = {var: (target var, line)} for `var = other_var`
+      calls     = [(parent, [(child, line), ...], call line)] for every add_child / add_children
+      anonymous = lines of Person(...) children passed inline (they have no variable to check)
+    """
+    tree = ast.parse(source, filename=filename)
+    defined = defaultdict(list)
+    aliases = {}
+    calls = []
+    anonymous = []
+    for stmt in tree.body:
+        if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+            target = stmt.targets[0].id
+            if _is_person_call(stmt.value):
+                defined[target].append(stmt.lineno)
+            elif isinstance(stmt.value, ast.Name):
+                aliases[target] = (stmt.value.id, stmt.lineno)
+        elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+            func = stmt.value.func
+            if not (isinstance(func, ast.Attribute) and func.attr in ("add_child", "add_children")
+                    and isinstance(func.value, ast.Name)):
+                continue
+            args = stmt.value.args
+            if func.attr == "add_children" and args and isinstance(args[0], (ast.List, ast.Tuple)):
+                nodes = args[0].elts
+            else:
+                nodes = args[:1]
+            children = []
+            for node in nodes:
+                if isinstance(node, ast.Name):
+                    children.append((node.id, getattr(node, "lineno", stmt.lineno)))
+                elif _is_person_call(node):
+                    anonymous.append(node.lineno)
+            calls.append((func.value.id, children, stmt.lineno))
+    return defined, aliases, calls, anonymous
+
+
+def validate(source, roots=ROOTS, filename=DATA_FILE):
+    """Return (errors, warnings) as lists of message strings."""
+    defined, aliases, calls, anonymous = parse_data(source, filename)
+    errors, warnings = [], []
+
+    def resolve(name):
+        seen = set()
+        while name in aliases and name not in seen:  # root_person = gopal_32
+            seen.add(name)
+            name = aliases[name][0]
+        return name
+
+    def first_def(name):
+        lines = defined.get(resolve(name))
+        return lines[0] if lines else None
+
+    for var, lines in defined.items():
+        if len(lines) > 1:
+            warnings.append(f"{var} is assigned a new Person {len(lines)} times (lines {lines})")
+    for var, (target, line) in aliases.items():
+        if first_def(target) is None and target not in aliases:
+            continue  # not a Person alias (e.g. some other constant)
+        if first_def(target) is not None and first_def(target) > line:
+            errors.append(f"line {line}: {var} = {target} before {target} is defined (line {first_def(target)})")
+
+    # ---------- graph ----------
+    children_of = defaultdict(list)   # parent -> [child, ...] in call order
+    parents_of = defaultdict(list)    # child -> [(parent, line), ...]
+    call_lines = defaultdict(list)    # parent -> lines with add_child(ren)
+    for parent_name, kids, line in calls:
+        parent = resolve(parent_name)
+        call_lines[parent].append(line)
+        if first_def(parent) is None:
+            errors.append(f"line {line}: {parent_name}.add_child... but {parent_name} is never defined")
+        elif first_def(parent) > line:
+            errors.append(f"line {line}: {parent_name} used before it is defined (line {first_def(parent)})")
+        for child_name, child_line in kids:
+            child = resolve(child_name)
+            if first_def(child) is None:
+                errors.append(f"line {child_line}: child {child_name} of {parent_name} is never defined")
+                continue
+            if first_def(child) > child_line:
+                errors.append(f"line {child_line}: {child_name} used before it is defined (line {first_def(child)})")
+            if child in children_of[parent]:
+                warnings.append(f"line {child_line}: {child_name} added to {parent_name} more than once")
+            else:
+                children_of[parent].append(child)
+            parents_of[child].append((parent, child_line))
+
+    for parent, lines in call_lines.items():
+        if len(lines) > 1:
+            warnings.append(f"{parent} called add_child/add_children {len(lines)} times at lines {lines}")
+
+    for child, parents in parents_of.items():
+        distinct = list(dict.fromkeys(p for p, _ in parents))
+        if len(distinct) > 1:
+            where = ", ".join(f"{p} (line {line})" for p, line in parents)
+            warnings.append(f"{child} is attached under {len(distinct)} parents: {where}")
+
+    for parent, kids in children_of.items():
+        parent_gen = var_gen(parent)
+        if parent_gen is None:
+            continue
+        for child in kids:
+            child_gen = var_gen(child)
+            if child_gen is not None and child_gen != parent_gen + 1:
+                warnings.append(f"{child} (gen {child_gen}) is a child of {parent} (gen {parent_gen}), "
+                                f"expected gen {parent_gen + 1}")
+
+    # ---------- cycles + reachability: one iterative DFS over every node ----------
+    WHITE, GREY, BLACK = 0, 1, 2
+    color = defaultdict(int)
+    reachable = set()
+    root_names = [resolve(r) for r in roots]
+    for root in root_names:
+        if first_def(root) is None:
+            errors.append(f"root {root} is never defined")
+    starts = root_names + [v for v in defined if v not in root_names]
+    for start in starts:
+        if color[start] != WHITE:
+            continue
+        from_root = start in root_names
+        stack = [(start, iter(children_of.get(start, ())))]
+        color[start] = GREY
+        if from_root:
+            reachable.add(start)
+        while stack:
+            node, kids = stack[-1]
+            child = next(kids, None)
+            if child is None:
+                color[node] = BLACK
+                stack.pop()
+                continue
+            if from_root:
+                reachable.add(child)
+            if color[child] == GREY:
+                path = [n for n, _ in stack]
+                cycle = path[path.index(child):] + [child]
+                errors.append("cycle: " + " -> ".join(cycle))
+            elif color[child] == WHITE:
+                color[child] = GREY
+                stack.append((child, iter(children_of.get(child, ()))))
+
+    # orphans: defined, not reachable from the roots, and not a child of anything (the top of a
+    # detached subtree; its own descendants are reported through it)
+    for var in defined:
+        if var not in reachable and not parents_of.get(var):
+            size = _subtree_size(var, children_of)
+            extra = f" (with {size - 1} descendants)" if size > 1 else ""
+            warnings.append(f"line {defined[var][0]}: {var} is never attached to the family tree{extra}")
+
+    for line in anonymous:
+        warnings.append(f"line {line}: inline Person(...) child without a variable; not checked")
+    return errors, warnings
+
+
+def _subtree_size(var, children_of):
+    seen = {var}
+    stack = [var]
+    while stack:
+        for child in children_of.get(stack.pop(), ()):
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return len(seen)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check genealogy_poudel_data.py without running it.")
+    parser.add_argument("data_file", nargs="?", default=DATA_FILE)
+    parser.add_argument("--roots", nargs="+", default=list(ROOTS), help="variables of the tree roots")
+    parser.add_argument("--strict", action="store_true", help="exit 1 on warnings too")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with open(args.data_file, encoding="utf-8") as f:
+        source = f.read()
+    try:
+        errors, warnings = validate(source, roots=args.roots, filename=args.data_file)
+    except SyntaxError as e:
+        print(f"❌ {args.data_file}:{e.lineno}: {e.msg}")
+        sys.exit(1)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for message in errors:
+        print(f"❌ {message}")
+    for message in warnings:
+        print(f"⚠️  {message}")
+    print(f"{'❌' if errors else '✅'} {args.data_file}: {len(errors)} errors, {len(warnings)} warnings "
+          f"({elapsed:.0f} ms)")
+    sys.exit(1 if errors or (args.strict and warnings) else 0)
@@ -0,0 +1,79 @@
+# Regression check: re-render both tree pages (in-memory and streamed) and compare them byte for byte
+# with the checked-in files. The --merge-spans and --css-classes variants are checked to draw the same
+# characters in the same colors and sizes (their markup differs on purpose).
+# Run from the repo root after touching print_tree / export_roots_trees:
+#   python helper/check_tree_output.py
+import os, re, sys, tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from genealogy import export_roots_trees, gopal_32, bishwamvar_34, GENERATION_COLORS
+
+# Where the connectors end and the icon / name markup starts
+CONNECTOR_END = re.compile(r'<img |<span style="color:[^;"]+; font-size')
+CONNECTOR_SPAN = re.compile(r'<span (?:style="color:([^"]+)"|class="g(\d+)")>([^<]*)</span>|([^<]+)')
+
+
+def inline_styles(html_line, language):
+    """A --css-classes line with its class names swapped back for the inline styles they stand for."""
+    font_size = 24 if language == "en" else 28
+    color = lambda m: GENERATION_COLORS[int(m.group(1))]
+    html_line = re.sub(r'class="nm g(\d+)"', lambda m: f'style="color:{color(m)}; font-size:{font_size}px"', html_line)
+    html_line = re.sub(r'class="cm g(\d+)" title="View note"',
+                       lambda m: f'class="cm" style="color:{color(m)}" title="View note"   ', html_line)
+    return re.sub(r'class="mk g(\d+)"', lambda m: f'style="color:{color(m)}; font-weight:bold"', html_line)
+
+
+def drawn_connectors(html_line):
+    """(connector characters with their colors, rest of the line); spaces count as uncolored."""
+    match = CONNECTOR_END.search(html_line)
+    head, tail = (html_line[:match.start()], html_line[match.start():]) if match else (html_line, "")
+    chars = []
+    for style_color, class_index, span_text, bare_text in CONNECTOR_SPAN.findall(head.removeprefix("<div>")):
+        color = style_color or (GENERATION_COLORS[int(class_index)] if class_index else None)
+        for char in span_text or bare_text:
+            chars.append((char, None if char == " " else color))
+    return chars, tail
+
+roots = [gopal_32, bishwamvar_34]
+failed = False
+with tempfile.TemporaryDirectory() as tmp:
+    for language, stream in [("en", False), ("en", True), ("np", False), ("np", True)]:
+        out_html = os.path.join(tmp, f"sisneri_poudel_tree_{language}.html")
+        out_txt = os.path.join(tmp, f"sisneri_poudel_tree_{language}.txt")
+        export_roots_trees(roots, print_language=language, out_html_path=out_html, out_txt_path=out_txt,
+                           stream=stream)
+        mode = "streamed" if stream else "in-memory"
+        for generated in (out_html, out_txt):
+            expected = os.path.basename(generated)
+            with open(generated, "rb") as f:
+                new_bytes = f.read()
+            with open(expected, "rb") as f:
+                old_bytes = f.read()
+            if new_bytes == old_bytes:
+                print(f"✅ {expected} ({mode}) is byte-identical")
+            else:
+                failed = True
+                # Point at the first differing line to make the diff easy to find
+                new_lines, old_lines = new_bytes.split(b"\n"), old_bytes.split(b"\n")
+                line_no = next((i for i, (a, b) in enumerate(zip(new_lines, old_lines), 1) if a != b),
+                               min(len(new_lines), len(old_lines)) + 1)
+                print(f"❌ {expected} ({mode}) differs (first difference at line {line_no})")
+
+    for language, option in [("en", "merge_spans"), ("np", "merge_spans"), ("en", "css_classes"), ("np", "css_classes")]:
+        out_html = os.path.join(tmp, f"{option}_{language}.html")
+        export_roots_trees(roots, print_language=language, out_html_path=out_html,
+                           out_txt_path=os.path.join(tmp, f"{option}_{language}.txt"), **{option: True})
+        expected = f"sisneri_poudel_tree_{language}.html"
+        with open(out_html, encoding="utf-8") as f:
+            new_lines = [inline_styles(line, language) for line in f.read().split("\n") if line.startswith("<div>")]
+        with open(expected, encoding="utf-8") as f:
+            old_lines = [line for line in f.read().split("\n") if line.startswith("<div>")]
+        bad = [i for i, (a, b) in enumerate(zip(new_lines, old_lines), 1) if drawn_connectors(a) != drawn_connectors(b)]
+        if len(new_lines) == len(old_lines) and not bad:
+            saved = 1 - os.path.getsize(out_html) / os.path.getsize(expected)
+            print(f"✅ {expected} with {option} draws the same ({saved:.0%} smaller)")
+        else:
+            failed = True
+            print(f"❌ {expected} with {option} draws differently (first difference at tree line {bad[0] if bad else '?'})")
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,114 @@
+# Synthetic family forests built from the real Person class, for benchmarks.
+# Used by helper/bench_pipeline.py; can also be run on its own to see what it generates:
+#   python helper/synthetic_forest.py 30000
+import math, os, random, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from genealogy_class import Person
+
+# (English, Nepali) name pools; repeats are realistic, the real data reuses names a lot
+MALE_NAMES = [
+    ("Gopal", "गोपाल"), ("Ram", "राम"), ("Krishna", "कृष्ण"), ("Hari", "हरि"), ("Shiva", "शिव"),
+    ("Prajapati", "प्रजापति"), ("Lekhnath", "लेखनाथ"), ("Govinda", "गोविन्द"), ("Narayan", "नारायण"),
+    ("Dev Raj", "देवराज"), ("Bishnu", "विष्णु"), ("Tika Ram", "टीकाराम"), ("Durga Prasad", "दुर्गाप्रसाद"),
+    ("Keshav", "केशव"), ("Madhav", "माधव"), ("Shankar", "शंकर"),
+]
+FEMALE_NAMES = [("Sita", "सीता"), ("Gita", "गीता"), ("Laxmi", "लक्ष्मी"), ("Radha", "राधा"), ("Kamala", "कमला")]
+PLACES = ["Sisneri", "Kathmandu", "Lalitpur", "Makwanpur", "Chitwan"]
+COMMENTS = ["काठमाण्डौ उपत्यका आउने", "लुभू सिस्नेरीमा बस्ने", "ठूलाघरे पूर्वज", "Moved abroad"]
+# edit notes: "+ ..." marks an added person, "# ..." a correction (see print_tree)
+EDITS = ["+ स्रोत: आशिष", "+ स्रोत: विनोद (बुवा)", "# स्रोत: स्वयं\nसच्याउनु अघिको नाम: मधुसूदन"]
+
+
+def _poisson(rng, mean):
+    """Knuth's method; fine for the small means used here."""
+    limit = math.exp(-mean)
+    k, p = 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+def synthetic_forest(count, roots=2, depth=20, branching=None, female_ratio=0.03, comment_density=0.01,
+                     edit_density=0.007, seed=1):
+    """
+    Build `count` linked Person objects (through add_child, like the data file) spread over `roots` trees.
+
+    :param count: total number of people.
+    :param roots: number of unconnected root trees; root i gets gen_number 32 + i.
+    :param depth: generations to aim for; the number of sons per man is scaled so the trees reach
+                  `count` at about this depth (ignored when `branching` is given).
+    :param branching: optional weights for 0, 1, 2, ... children per man (e.g. the real data is
+                      roughly [1393, 799, 458, 204, 89, 42, 13, 6, 1, 1, 2]); default is Poisson.
+    :param female_ratio: share of children who are daughters. As in the real data, only sons'
+                         lines are continued.
+    :param comment_density: share of people with a comment (rendered as a tooltip asterisk).
+    :param edit_density: share of people with an edit note (rendered as a + or correction mark).
+    :param seed: random seed, so runs are comparable.
+    :return: list of root Person objects.
+    """
+    rng = random.Random(seed)
+    made = 0
+
+    def new_person(gender, gen_number=None):
+        nonlocal made
+        name, name_nep = rng.choice(MALE_NAMES if gender == "Male" else FEMALE_NAMES)
+        made += 1
+        return Person(
+            name=name, name_nep=name_nep, gender=gender, gen_number=gen_number,
+            birth_year=1620 + 25 * rng.randint(0, depth) if rng.random() < 0.05 else None,
+            place=rng.choice(PLACES) if rng.random() < 0.02 else None,
+            comment=rng.choice(COMMENTS) if rng.random() < comment_density else None,
+            edit=rng.choice(EDITS) if rng.random() < edit_density else False,
+        )
+
+    root_people = [new_person("Male", gen_number=32 + i) for i in range(roots)]
+    if branching is None:
+        # men per generation must grow by (count/roots)^(1/depth), and only sons have children
+        growth = max(count / max(roots, 1), 1.0) ** (1.0 / max(depth, 1))
+        mean = growth / max(1.0 - female_ratio, 0.01)
+        children_of = lambda: _poisson(rng, mean)
+    else:
+        sizes = range(len(branching))
+        children_of = lambda: rng.choices(sizes, weights=branching)[0]
+
+    generation = list(root_people)
+    while made < count and generation:
+        next_generation = []
+        for father in generation:
+            for _ in range(children_of()):
+                if made >= count:
+                    break
+                child = new_person("Female" if rng.random() < female_ratio else "Male")
+                father.add_child(child)
+                if child.gender == "Male":
+                    next_generation.append(child)
+        if not next_generation and made < count:
+            # every line died out; keep one going so we still reach `count`
+            father = rng.choice(generation)
+            child = new_person("Male")
+            father.add_child(child)
+            next_generation.append(child)
+        generation = next_generation
+    return root_people
+
+
+def forest_stats(roots):
+    """(people, max depth, people with comments, daughters) of a forest."""
+    people = max_depth = comments = daughters = 0
+    stack = [(root, 0) for root in roots]
+    while stack:
+        person, level = stack.pop()
+        people += 1
+        max_depth = max(max_depth, level)
+        comments += bool(person.comment)
+        daughters += person.gender == "Female"
+        stack.extend((child, level + 1) for child in person.children)
+    return people, max_depth, comments, daughters
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    people, max_depth, comments, daughters = forest_stats(synthetic_forest(count))
+    print(f"✅ {people} people, {max_depth + 1} generations, {comments} comments, {daughters} daughters")